@@ -1,110 +1,172 @@
 from flask import Flask, send_from_directory, jsonify, request, render_template, Response
 from flask_cors import CORS
-import osmnx as ox
-import networkx as nx
 import json
 import os
 import time
 import shutil
+import threading
+
+from shapely.geometry import shape
+
+from backend.graph_store import DEFAULT_PLACE, NETWORK_TYPES, fixture_graph, get_graph_data
+from backend.hex_bins import ZOOM_LEVELS, DensityBins
+from backend.isochrone import SHAPES, IsochroneEngine
+from backend.json_writer import JsonWriter, WriterBusy
+from backend.lru_cache import LRUCache
+from backend.project_registry import ProjectRegistry, is_project_id
+from backend.response_store import ResponseStore
+from backend.results_summary import ResultsSummary
+from backend.routing import SearchPool, build_routers, distance_matrix, route_batch, route_coordinates
+from backend.snapping import NodeIndex
 
 CONFIG_ROOT = os.path.join(os.path.dirname(__file__), 'static', 'data', 'projects')
+PROJECTS = ProjectRegistry(CONFIG_ROOT)
+# Saves are acknowledged once durable; a full queue answers 503 (see writer_busy)
+WRITER = JsonWriter(max_pending=int(os.environ.get('WRITE_QUEUE_SIZE', 64)))
+RESPONSE_STORE = ResponseStore(CONFIG_ROOT)
+RESULTS_SUMMARY = ResultsSummary(RESPONSE_STORE)
+DENSITY_BINS = DensityBins(CONFIG_ROOT, RESULTS_SUMMARY)
 
 app = Flask(__name__, static_folder='static', template_folder='templates')
 CORS(app)
 
 # OSMnx Service Logic
-print("Loading walking network graph from OSMnx")
-try:
-    G = ox.graph_from_place("Palaiseau, France", network_type="walk")
-    print(f"Walking graph loaded. {len(G.nodes)} nodes")
-    
-    G_bike = ox.graph_from_place("Palaiseau, France", network_type="bike")
-    print(f"Cycling graph loaded. {len(G_bike.nodes)} nodes")
-except Exception as e:
-    print(f"Error loading graphs: {e}")
-    G = None
-    G_bike = None
-
-def get_isochrone(lat, lon, distance_meters, mode='walk'):
-    graph = G if mode == 'walk' else G_bike
-    
-    if graph is None:
+# Networks come from the on-disk graph store (backend/graph_store.py); OSM is
+# only queried when the store is empty or a refresh is requested.
+GRAPH_PLACE = os.environ.get('GRAPH_PLACE', DEFAULT_PLACE)
+ISOCHRONE_BUCKET_METERS = 10
+# 'auto' uses the contraction hierarchy once prepared and A* until then
+ROUTING_ALGORITHM = os.environ.get('ROUTING_ALGORITHM', 'auto')
+MAX_BATCH_ROUTES = 1000
+MAX_MATRIX_CELLS = 250000
+MATRIX_WORKERS = int(os.environ.get('MATRIX_WORKERS', os.cpu_count() or 1))
+
+class Network:
+    """A loaded street network and everything derived from it.
+
+    Never modified after construction: a reload builds new ones and swaps
+    the ``NETWORKS`` dict in one assignment, so a request that looked one up
+    keeps a matching graph, index, routers and cache throughout.
+    """
+
+    def __init__(self, data):
+        self.data = data
+        self.engine = IsochroneEngine(data)
+        self.index = NodeIndex(data)
+        self.routers = build_routers(data)
+        # Worker processes for ``parallel`` batch routes and matrices
+        self.search_pool = SearchPool(data, MATRIX_WORKERS)
+        # Reach polygons keyed by (mode, origin node, bucketed distances, minutes, shape)
+        self.isochrone_cache = LRUCache(maxsize=int(os.environ.get('ISOCHRONE_CACHE_SIZE', 512)))
+        # Route Features keyed by (mode, algorithm, orig node, dest node). Kept
+        # per Network so a request still running on the old graph after a
+        # reload can only fill the old cache.
+        self.route_cache = LRUCache(
+            maxsize=int(os.environ.get('ROUTE_CACHE_SIZE', 1024)),
+            ttl=float(os.environ['ROUTE_CACHE_TTL']) if os.environ.get('ROUTE_CACHE_TTL') else None
+        )
+
+# Network type -> Network; replaced as a whole by load_networks
+NETWORKS = {}
+NETWORKS_RELOAD = threading.Lock()
+
+def load_networks(refresh=False):
+    """Load every network type; one that fails keeps its previous Network.
+
+    Returns ``(loaded, errors)``, both keyed by network type.
+    """
+    global NETWORKS
+    loaded, errors = {}, {}
+    with NETWORKS_RELOAD:
+        for network_type in NETWORK_TYPES:
+            start = time.perf_counter()
+            try:
+                if os.environ.get('GRAPH_FIXTURE'):
+                    data = fixture_graph(network_type)
+                else:
+                    data = get_graph_data(GRAPH_PLACE, network_type, refresh=refresh)
+                loaded[network_type] = Network(data)
+                print(f"{network_type} graph loaded. {data.num_nodes} nodes ({time.perf_counter() - start:.2f}s)")
+            except Exception as e:
+                errors[network_type] = str(e)
+                kept = " (keeping the previous one)" if network_type in NETWORKS else ""
+                print(f"Error loading {network_type} graph{kept}: {e}")
+
+        replaced = [NETWORKS[name] for name in loaded if name in NETWORKS]
+        NETWORKS = dict(NETWORKS, **loaded)
+    for network in replaced:
+        network.search_pool.close()
+    for network in loaded.values():
+        network.routers['ch'].prepare_async()
+    return loaded, errors
+
+# Search pool workers are spawned and import this script again as
+# __mp_main__; they open their own graph and must not load the networks
+if __name__ != '__mp_main__':
+    print("Loading street networks from graph store")
+    load_networks(refresh=bool(os.environ.get('GRAPH_REFRESH')))
+
+# Average travel speeds (metres per minute) used for time-based isochrones
+TRAVEL_SPEEDS = {'walk': 80.0, 'bike': 250.0}
+MAX_ISOCHRONE_BANDS = 10
+
+def get_isochrone(lat, lon, distance_meters, mode='walk', minutes=None, shape='concave'):
+    """Isochrone bands around (lat, lon); ``distance_meters`` may be a number or a list."""
+    if not isinstance(distance_meters, (list, tuple)):
+        distance_meters = [distance_meters]
+    network = NETWORKS.get('walk' if mode == 'walk' else 'bike')
+    if network is None:
         return None
     try:
-        node = ox.nearest_nodes(graph, lon, lat)
-        subgraph = nx.ego_graph(graph, node, radius=distance_meters, distance="length")
-        
-        if len(subgraph.nodes) < 3:
-            return None
-
-        nodes_gdf = ox.graph_to_gdfs(subgraph, edges=False)
-        polygon = nodes_gdf.unary_union.convex_hull
-        
-        return {
-            "type": "FeatureCollection",
-            "features": [{
-                "type": "Feature",
-                "properties": {"distance": distance_meters, "mode": mode},
-                "geometry": json.loads(json.dumps(polygon.__geo_interface__))
-            }]
-        }
+        node, _ = network.index.nearest(lon, lat)
+        buckets = tuple(
+            max(ISOCHRONE_BUCKET_METERS, round(d / ISOCHRONE_BUCKET_METERS) * ISOCHRONE_BUCKET_METERS)
+            for d in distance_meters
+        )
+        key = (mode, node, buckets, tuple(minutes) if minutes else None, shape)
+        isochrone = network.isochrone_cache.get(key)
+        if isochrone is None:
+            isochrone = network.engine.isochrone(node, list(buckets), mode, minutes, shape)
+            if isochrone is not None:
+                network.isochrone_cache.put(key, isochrone)
+        return isochrone
     except Exception as e:
         print(f"Error calculating isochrone: {e}")
         return None
 
-def get_latest_config_path():
-    if not os.path.exists(CONFIG_ROOT):
-        return None
-    latest_path = None
-    latest_mtime = 0
-    for entry in os.scandir(CONFIG_ROOT):
-        if entry.is_dir():
-            candidate = os.path.join(entry.path, 'config.json')
-            if os.path.exists(candidate):
-                mtime = os.path.getmtime(candidate)
-                if mtime > latest_mtime:
-                    latest_mtime = mtime
-                    latest_path = candidate
-    return latest_path
-
-def list_projects():
-    projects = []
-    if not os.path.exists(CONFIG_ROOT):
-        return projects
-    for entry in os.scandir(CONFIG_ROOT):
-        if entry.is_dir():
-            cfg_path = os.path.join(entry.path, 'config.json')
-            if os.path.exists(cfg_path):
-                try:
-                    with open(cfg_path, 'r') as f:
-                        cfg = json.load(f)
-                    stat = os.stat(cfg_path)
-                    projects.append({
-                        "id": cfg.get('project', {}).get('id') or entry.name,
-                        "name": cfg.get('project', {}).get('name'),
-                        "location": cfg.get('project', {}).get('location'),
-                        "mapId": cfg.get('project', {}).get('mapId'),
-                        "updatedAt": stat.st_mtime
-                    })
-                except Exception:
-                    continue
-    return projects
-
 @app.route('/api/isochrone', methods=['POST'])
 def calculate_isochrone():
     try:
         data = request.json
         lat = float(data.get('lat'))
         lon = float(data.get('lon'))
-        distance = int(data.get('distance', 500))
         mode = data.get('mode', 'walk')
-        
+        minutes = data.get('minutes')
+        shape = data.get('shape', 'concave')
+
+        if shape not in SHAPES:
+            return jsonify({"error": f"Shape must be one of {', '.join(SHAPES)}"}), 400
         if not (-90 <= lat <= 90) or not (-180 <= lon <= 180):
             return jsonify({"error": "Invalid coordinates"}), 400
-        if not (10 <= distance <= 10000):
+
+        if minutes is not None:
+            if not isinstance(minutes, list):
+                minutes = [minutes]
+            minutes = [float(m) for m in minutes]
+            speed = TRAVEL_SPEEDS.get(mode, TRAVEL_SPEEDS['walk'])
+            distances = [int(round(m * speed)) for m in minutes]
+        else:
+            distances = data.get('distances', data.get('distance', 500))
+            if not isinstance(distances, list):
+                distances = [distances]
+            distances = [int(d) for d in distances]
+
+        if not distances or len(distances) > MAX_ISOCHRONE_BANDS:
+            return jsonify({"error": f"Provide between 1 and {MAX_ISOCHRONE_BANDS} thresholds"}), 400
+        if not all(10 <= d <= 10000 for d in distances):
             return jsonify({"error": "Distance must be between 10 and 10000 meters"}), 400
-            
-        isochrone = get_isochrone(lat, lon, distance, mode)
+
+        isochrone = get_isochrone(lat, lon, distances, mode, minutes, shape)
         if isochrone is None:
             return jsonify({"error": "Failed to calculate isochrone"}), 500
         return jsonify(isochrone)
@@ -113,38 +175,169 @@ def calculate_isochrone():
 
 @app.route('/api/route', methods=['POST'])
 def get_route():
-    if G is None:
-        return jsonify({'error': 'Graph not loaded'}), 500
     try:
         data = request.json
         if not data:
             return jsonify({'error': 'Invalid JSON'}), 400
-            
+
         start = data.get('start')
         end = data.get('end')
         if not start or not end:
             return jsonify({'error': 'Missing start or end coordinates'}), 400
 
-        orig_node = ox.nearest_nodes(G, start[0], start[1])
-        dest_node = ox.nearest_nodes(G, end[0], end[1])
-        route_nodes = nx.shortest_path(G, orig_node, dest_node, weight='length')
-        route_coords = []
-        for node in route_nodes:
-            point = G.nodes[node]
-            route_coords.append([point['x'], point['y']])
+        mode = data.get('mode', 'walk')
+        network = NETWORKS.get('walk' if mode == 'walk' else 'bike')
+        if network is None:
+            return jsonify({'error': 'Graph not loaded'}), 500
+        routers = network.routers
+
+        algorithm = data.get('algorithm', ROUTING_ALGORITHM)
+        if algorithm == 'auto':
+            algorithm = 'ch' if routers['ch'].ready else 'astar'
+        if algorithm not in routers:
+            return jsonify({'error': f"Unknown algorithm: {algorithm}"}), 400
+        router = routers[algorithm]
+        if not router.ready:
+            return jsonify({'error': 'Contraction hierarchy is still being prepared'}), 503
+
+        index = network.index
+        snapped, _ = index.nearest_many([start[0], end[0]], [start[1], end[1]])
+        orig_node = int(snapped[0])
+        dest_node = int(snapped[1])
+        # Algorithms may return different shortest paths of equal length
+        key = (mode, algorithm, orig_node, dest_node)
+        feature = network.route_cache.get(key)
+        if feature is None:
+            result = router.route(orig_node, dest_node)
+            if result is None:
+                return jsonify({'error': 'No route found'}), 404
+            route_nodes, length = result
+            feature = {
+                'type': 'Feature',
+                'properties': {'mode': mode, 'algorithm': algorithm, 'length': length},
+                'geometry': {
+                    'type': 'LineString',
+                    'coordinates': route_coordinates(index.data, route_nodes)
+                }
+            }
+            network.route_cache.put(key, feature)
+        return jsonify(feature)
+    except Exception as e:
+        print(f"Routing error: {e}")
+        return jsonify({'error': str(e)}), 500
+
+def parse_points(value):
+    """[lon, lat] pairs from a list of pairs, GeoJSON, or a static/data layer name.
+
+    Non-point features are reduced to a representative point, so e.g.
+    amenity polygons can be used directly as destinations.
+    """
+    if isinstance(value, str):
+        layer_path = os.path.join(app.root_path, 'static', 'data', f"{os.path.basename(value)}.geojson")
+        with open(layer_path, 'r') as f:
+            value = json.load(f)
+    if isinstance(value, dict):
+        features = value.get('features') if value.get('type') == 'FeatureCollection' else [value]
+        points = []
+        for feature in features:
+            geometry = shape(feature.get('geometry', feature))
+            point = geometry if geometry.geom_type == 'Point' else geometry.representative_point()
+            points.append([point.x, point.y])
+        return points
+    return [[float(point[0]), float(point[1])] for point in value]
+
+def parse_origins_destinations(data):
+    origins = parse_points(data.get('origins') or [])
+    destinations = parse_points(data.get('destinations') or [])
+    if not origins or not destinations:
+        raise ValueError('Missing origins or destinations')
+    return origins, destinations
+
+@app.route('/api/route/batch', methods=['POST'])
+def get_route_batch():
+    """Routes from every origin to every destination, one search per origin.
+
+    ``parallel`` spreads the searches over the network's worker processes.
+    """
+    try:
+        data = request.json
+        if not data:
+            return jsonify({'error': 'Invalid JSON'}), 400
+        origins, destinations = parse_origins_destinations(data)
+        if len(origins) * len(destinations) > MAX_BATCH_ROUTES:
+            return jsonify({'error': f'At most {MAX_BATCH_ROUTES} routes per batch'}), 400
 
+        mode = data.get('mode', 'walk')
+        network = NETWORKS.get('walk' if mode == 'walk' else 'bike')
+        if network is None:
+            return jsonify({'error': 'Graph not loaded'}), 500
+        index = network.index
+        orig_nodes, _ = index.nearest_many(*zip(*origins))
+        dest_nodes, _ = index.nearest_many(*zip(*destinations))
+
+        pool = network.search_pool if data.get('parallel') else None
+        rows = route_batch(index.data, orig_nodes, dest_nodes, pool, network.routers['dijkstra'])
+        features = []
+        for i, row in enumerate(rows):
+            for j, found in enumerate(row):
+                if found is None:
+                    continue
+                length, path = found
+                features.append({
+                    'type': 'Feature',
+                    'properties': {'origin': i, 'destination': j, 'mode': mode, 'length': length},
+                    'geometry': {
+                        'type': 'LineString',
+                        'coordinates': route_coordinates(index.data, path)
+                    }
+                })
+        return jsonify({'type': 'FeatureCollection', 'features': features})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        print(f"Batch routing error: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/matrix', methods=['POST'])
+def get_distance_matrix():
+    """Network distances (metres) and travel times (minutes) for origins x destinations."""
+    try:
+        data = request.json
+        if not data:
+            return jsonify({'error': 'Invalid JSON'}), 400
+        origins, destinations = parse_origins_destinations(data)
+        if len(origins) * len(destinations) > MAX_MATRIX_CELLS:
+            return jsonify({'error': f'At most {MAX_MATRIX_CELLS} matrix cells'}), 400
+
+        mode = data.get('mode', 'walk')
+        network = NETWORKS.get('walk' if mode == 'walk' else 'bike')
+        if network is None:
+            return jsonify({'error': 'Graph not loaded'}), 500
+        index = network.index
+        orig_nodes, orig_snap = index.nearest_many(*zip(*origins))
+        dest_nodes, dest_snap = index.nearest_many(*zip(*destinations))
+
+        pool = network.search_pool if data.get('parallel') else None
+        distances = distance_matrix(index.data, orig_nodes, dest_nodes, pool)
+        speed = TRAVEL_SPEEDS.get(mode, TRAVEL_SPEEDS['walk'])
         return jsonify({
-            'type': 'Feature',
-            'properties': {},
-            'geometry': {
-                'type': 'LineString',
-                'coordinates': route_coords
-            }
+            'mode': mode,
+            'origins': origins,
+            'destinations': destinations,
+            'distances': distances,
+            'durations': [[d / speed if d is not None else None for d in row] for row in distances],
+            'snap_distances': {'origins': orig_snap.tolist(), 'destinations': dest_snap.tolist()}
         })
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
-        print(f"Routing error: {e}")
+        print(f"Matrix error: {e}")
         return jsonify({'error': str(e)}), 500
 
+def writer_busy(error):
+    print(f"Write queue full: {error}")
+    return jsonify({'error': 'Server busy saving, please retry'}), 503, {'Retry-After': '1'}
+
 @app.route('/api/save_geojson', methods=['POST'])
 def save_geojson():
     try:
@@ -163,14 +356,7 @@ def save_geojson():
         filename = os.path.basename(filename)
 
         if not project_id:
-            latest = get_latest_config_path()
-            if latest:
-                try:
-                    with open(latest, 'r') as f:
-                        cfg = json.load(f)
-                        project_id = cfg.get('project', {}).get('id')
-                except Exception:
-                    project_id = None
+            project_id = PROJECTS.latest_project_id()
         if not project_id:
             project_id = 'default-project'
 
@@ -178,11 +364,12 @@ def save_geojson():
         os.makedirs(answers_dir, exist_ok=True)
         filepath = os.path.join(answers_dir, filename)
         
-        with open(filepath, 'w') as f:
-            json.dump(geojson, f, indent=2)
-            
+        WRITER.write(filepath, geojson)
+
         print(f"Saved GeoJSON to {filepath}")
         return jsonify({'status': 'success', 'filepath': filepath})
+    except WriterBusy as e:
+        return writer_busy(e)
     except Exception as e:
         print(f"Error saving GeoJSON: {e}")
         return jsonify({'error': str(e)}), 500
@@ -210,14 +397,7 @@ def save_responses():
             project_id = responses.get('projectId')
 
         if not project_id:
-            latest = get_latest_config_path()
-            if latest:
-                try:
-                    with open(latest, 'r') as f:
-                        cfg = json.load(f)
-                        project_id = cfg.get('project', {}).get('id')
-                except Exception:
-                    project_id = None
+            project_id = PROJECTS.latest_project_id()
         if not project_id:
             project_id = 'default-project'
 
@@ -225,11 +405,19 @@ def save_responses():
         os.makedirs(answers_dir, exist_ok=True)
         filepath = os.path.join(answers_dir, filename)
 
-        with open(filepath, 'w') as f:
-            json.dump(responses, f, indent=2)
+        WRITER.write(filepath, responses)
+        if filename.endswith('.json'):
+            try:
+                version = RESPONSE_STORE.add(project_id, filename, responses)
+                RESULTS_SUMMARY.add(project_id, filename, responses, version)
+            except Exception as e:
+                # The file is saved; the next listing reconciles the index
+                print(f"Error indexing responses: {e}")
 
         print(f"Saved responses to {filepath}")
         return jsonify({'status': 'success', 'filepath': filepath})
+    except WriterBusy as e:
+        return writer_busy(e)
     except Exception as e:
         print(f"Error saving responses: {e}")
         return jsonify({'error': str(e)}), 500
@@ -255,64 +443,123 @@ def list_responses():
 
         try:
             os.remove(filepath)
+            RESPONSE_STORE.remove(project_id, filename)
             return jsonify({'status': 'deleted', 'filename': filename})
         except Exception as e:
             return jsonify({'error': str(e)}), 500
 
     project_id = request.args.get('project')
     if not project_id:
-        latest = get_latest_config_path()
-        if latest:
-            try:
-                with open(latest, 'r') as f:
-                    cfg = json.load(f)
-                    project_id = cfg.get('project', {}).get('id')
-            except Exception:
-                project_id = None
+        project_id = PROJECTS.latest_project_id()
     if not project_id:
         project_id = 'default-project'
 
-    answers_dir = os.path.join(CONFIG_ROOT, project_id, 'answers')
-    if not os.path.exists(answers_dir):
-        return jsonify({'responses': []})
-
-    responses = []
-    for entry in os.scandir(answers_dir):
-        if not entry.is_file() or not entry.name.endswith('.json'):
-            continue
-        try:
-            with open(entry.path, 'r') as f:
-                data = json.load(f)
-            if not isinstance(data, dict) or 'answers' not in data:
-                continue
-            if not data.get('savedAt'):
-                data['savedAt'] = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(entry.stat().st_mtime))
-            data['__filename'] = entry.name
-            responses.append(data)
-        except Exception:
-            continue
-
-    responses.sort(key=lambda item: item.get('savedAt', ''), reverse=True)
-    return jsonify({'responses': responses})
+    limit = request.args.get('limit', type=int)
+    offset = request.args.get('offset', default=0, type=int)
+    if (limit is not None and limit < 0) or offset < 0:
+        return jsonify({'error': 'limit and offset must be non-negative'}), 400
+    since = request.args.get('since')
+    summary = request.args.get('summary', '').lower() in ('1', 'true', 'yes')
+    # ?filename= (repeatable) fetches just those responses, e.g. for a download
+    filenames = [os.path.basename(name) for name in request.args.getlist('filename')] or None
+
+    # Newest first, from the per-project index; bodies are stored pre-serialized
+    items, total = RESPONSE_STORE.query(project_id, limit, offset, since, summary, filenames)
+    if summary:
+        return jsonify({'responses': items, 'total': total, 'offset': offset, 'limit': limit})
+    body = '{"responses":[%s],"total":%d,"offset":%d,"limit":%s}' % (
+        ','.join(items), total, offset, json.dumps(limit)
+    )
+    return Response(body, mimetype='application/json')
+
+@app.route('/api/results/<project_id>/summary', methods=['GET'])
+def results_summary(project_id):
+    """Per-question counts, option histograms and text answers for a project.
+
+    ``?question=<id>`` returns that question's answers merged into point,
+    line and polygon FeatureCollections instead. ``?response=<file>``
+    (repeatable) or ``?responses=a,b`` restricts the aggregate to those files.
+    """
+    project_id = os.path.basename(project_id)
+    filenames = request.args.getlist('response')
+    for item in request.args.get('responses', '').split(','):
+        filenames.append(item)
+    filenames = sorted({os.path.basename(item.strip()) for item in filenames if item.strip()})
+    question_id = request.args.get('question')
+
+    if question_id:
+        version, body = RESULTS_SUMMARY.features_json(project_id, question_id, filenames or None)
+    else:
+        version, body = RESULTS_SUMMARY.summary_json(project_id, filenames or None)
+    if filenames:
+        return Response(body, mimetype='application/json')
+
+    # Generation and revision: revisions restart if the project is recreated
+    etag = f'"{version}"'
+    if request.headers.get('If-None-Match') == etag:
+        return Response(status=304, headers={'ETag': etag})
+    return Response(body, mimetype='application/json', headers={'ETag': etag})
+
+@app.route('/api/results/<project_id>/density', methods=['GET'])
+def results_density(project_id):
+    """Hexagon density cells of one question's drawn answers at ``?zoom=``."""
+    project_id = os.path.basename(project_id)
+    question_id = request.args.get('question')
+    if not question_id:
+        return jsonify({'error': 'Missing question'}), 400
+    zoom = request.args.get('zoom', default=ZOOM_LEVELS[-1], type=float)
+    try:
+        body = DENSITY_BINS.get(project_id, question_id, int(zoom))
+    except Exception as e:
+        print(f"Error binning responses: {e}")
+        return jsonify({'error': str(e)}), 500
+    return Response(body, mimetype='application/json')
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
+    networks = NETWORKS
+    walk = networks.get('walk')
     return jsonify({
         "status": "ok",
-        "graph_nodes": len(G.nodes) if G else 0,
-        "graph_edges": len(G.edges) if G else 0
+        "graph_nodes": walk.data.num_nodes if walk else 0,
+        "graph_edges": walk.data.num_edges if walk else 0,
+        "contraction_hierarchy": {name: network.routers['ch'].ready for name, network in networks.items()},
+        "isochrone_cache": {name: network.isochrone_cache.stats() for name, network in networks.items()},
+        "route_cache": {name: network.route_cache.stats() for name, network in networks.items()},
+        "writer": WRITER.stats()
     })
 
+@app.route('/api/graph/reload', methods=['POST'])
+def reload_graphs():
+    """Reload networks from the graph store; ``refresh`` re-downloads from OSM."""
+    data = request.get_json(silent=True) or {}
+    loaded, errors = load_networks(refresh=bool(data.get('refresh')))
+    return jsonify({
+        "status": "reloaded" if not errors else "partial",
+        "networks": {name: network.data.meta for name, network in loaded.items()},
+        "errors": errors
+    })
+
+def cached_json(body: bytes, etag: str):
+    """JSON response that browsers revalidate with If-None-Match on every use."""
+    headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+    if request.headers.get('If-None-Match') == etag:
+        return Response(status=304, headers=headers)
+    return Response(body, mimetype='application/json', headers=headers)
+
 @app.route('/api/projects', methods=['GET'])
 def projects_list():
     """Return list of available projects with metadata."""
-    return jsonify(list_projects())
+    etag, body = PROJECTS.listing()
+    return cached_json(body, etag)
 
 @app.route('/api/projects/<project_id>', methods=['DELETE'])
 def delete_project(project_id):
     """Delete a project and its data."""
     if not project_id:
         return jsonify({"error": "Missing project ID"}), 400
+    if not is_project_id(project_id):
+        return jsonify({"error": "Invalid project ID"}), 400
     
     project_dir = os.path.join(CONFIG_ROOT, project_id)
     if not os.path.exists(project_dir):
@@ -320,6 +567,7 @@ def delete_project(project_id):
         
     try:
         shutil.rmtree(project_dir)
+        PROJECTS.remove(project_id)
         return jsonify({"status": "deleted", "id": project_id})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -328,19 +576,14 @@ def delete_project(project_id):
 def config_store():
     if request.method == 'GET':
         project_id = request.args.get('project')
-        if project_id:
-            cfg_path = os.path.join(CONFIG_ROOT, project_id, 'config.json')
-        else:
-            cfg_path = get_latest_config_path()
-
-        if cfg_path and os.path.exists(cfg_path):
-            try:
-                with open(cfg_path, 'r') as f:
-                    data = json.load(f)
-                return jsonify(data)
-            except Exception as e:
-                return jsonify({"error": f"Failed to read config: {e}"}), 500
-        return jsonify({"error": "Config not found"}), 404
+        if project_id and not is_project_id(project_id):
+            return jsonify({"error": "Invalid project ID"}), 400
+        entry = PROJECTS.get(project_id) if project_id else PROJECTS.latest()
+        if entry is None:
+            return jsonify({"error": "Config not found"}), 404
+        if entry.error:
+            return jsonify({"error": f"Failed to read config: {entry.error}"}), 500
+        return cached_json(entry.body, entry.etag)
 
     try:
         payload = request.get_json()
@@ -355,14 +598,18 @@ def config_store():
         project_id = project.get('id')
         if not project_id:
             return jsonify({"error": "Config missing project.id"}), 400
+        if not is_project_id(project_id):
+            return jsonify({"error": "Invalid project.id"}), 400
 
         project_dir = os.path.join(CONFIG_ROOT, project_id)
         os.makedirs(project_dir, exist_ok=True)
         cfg_path = os.path.join(project_dir, 'config.json')
-        with open(cfg_path, 'w') as f:
-            json.dump(config_body, f, indent=2)
+        WRITER.write(cfg_path, config_body)
+        PROJECTS.put(project_id, config_body)
 
         return jsonify({"status": "saved", "path": cfg_path})
+    except WriterBusy as e:
+        return writer_busy(e)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
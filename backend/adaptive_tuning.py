@@ -0,0 +1,114 @@
+"""Runtime tuning of AprilTag detector parameters from measured frame time.
+
+``AdaptiveController`` watches how long each detect call takes and how good
+the detections are (mean decision margin, tags lost since the previous
+frame). Every ``window`` frames it takes at most one step:
+
+- quality poor (e.g. the room got darker): lower ``quad_decimate``, adding a
+  thread if that puts detection over budget;
+- over the per-frame budget: add a thread, or raise ``quad_decimate`` once
+  at ``max_threads``;
+- well under budget: lower ``quad_decimate`` first, then give threads back.
+
+Parameters are written into the running detector, so no restart or rebuild
+is needed when lighting changes mid-session.
+"""
+import os
+
+
+def set_detector_params(detector, quad_decimate: float = None, nthreads: int = None):
+    """Change a live pupil_apriltags Detector; applies from the next detect call."""
+    contents = detector.tag_detector_ptr.contents
+    if quad_decimate is not None:
+        detector.params["quad_decimate"] = quad_decimate
+        contents.quad_decimate = float(quad_decimate)
+    if nthreads is not None:
+        detector.params["nthreads"] = nthreads
+        contents.nthreads = int(nthreads)
+
+
+class AdaptiveController:
+    """Per-worker controller; ``scan_detectors`` get decimation changes, all get threads."""
+
+    def __init__(self, detectors, scan_detectors=None, target_fps: float = 30.0, workers: int = 1,
+                 min_margin: float = 20.0, decimate_range=(1.0, 3.0), decimate_step: float = 0.5,
+                 max_threads: int = None, window: int = 30, verbose: bool = True):
+        self.detectors = list(detectors)
+        self.scan_detectors = list(scan_detectors if scan_detectors is not None else detectors)
+        # Each worker only sees every ``workers``-th frame
+        self.budget = workers / target_fps
+        self.min_margin = min_margin
+        self.decimate_min, self.decimate_max = decimate_range
+        self.decimate_step = decimate_step
+        self.max_threads = max_threads or os.cpu_count() or 1
+        self.window = window
+        self.verbose = verbose
+        self.quad_decimate = float(self.scan_detectors[0].params["quad_decimate"])
+        self.nthreads = int(self.detectors[0].params["nthreads"])
+        self.adjustments = 0
+        self._previous_ids = set()
+        self._reset()
+
+    def _reset(self):
+        self._frames = 0
+        self._seconds = 0.0
+        self._margin_sum = 0.0
+        self._margin_count = 0
+        self._lost = 0
+
+    def record(self, seconds: float, detections):
+        """Account one detect call; adjusts parameters at the end of a window."""
+        ids = set()
+        for det in detections:
+            ids.add(int(det.tag_id))
+            self._margin_sum += float(det.decision_margin)
+            self._margin_count += 1
+        self._lost += len(self._previous_ids - ids)
+        self._previous_ids = ids
+        self._frames += 1
+        self._seconds += seconds
+        if self._frames >= self.window:
+            self._adjust()
+            self._reset()
+
+    def _adjust(self):
+        frame_time = self._seconds / self._frames
+        mean_margin = self._margin_sum / self._margin_count if self._margin_count else None
+        poor_quality = self._lost > 0 or (mean_margin is not None and mean_margin < self.min_margin)
+        over_budget = frame_time > self.budget
+        under_budget = frame_time < 0.6 * self.budget
+
+        quad_decimate, nthreads = self.quad_decimate, self.nthreads
+        if poor_quality and quad_decimate > self.decimate_min:
+            quad_decimate = max(self.decimate_min, quad_decimate - self.decimate_step)
+            if over_budget:
+                nthreads = min(self.max_threads, nthreads + 1)
+        elif over_budget:
+            if nthreads < self.max_threads:
+                nthreads += 1
+            else:
+                quad_decimate = min(self.decimate_max, quad_decimate + self.decimate_step)
+        elif under_budget and not poor_quality:
+            lower = max(self.decimate_min, quad_decimate - self.decimate_step)
+            # Quad detection cost grows roughly with the decimated image area;
+            # don't step down into a setting that would immediately be over budget
+            if quad_decimate > self.decimate_min and frame_time * (quad_decimate / lower) ** 2 < 0.9 * self.budget:
+                quad_decimate = lower
+            elif quad_decimate == self.decimate_min and nthreads > 1:
+                nthreads -= 1
+
+        if (quad_decimate, nthreads) == (self.quad_decimate, self.nthreads):
+            return
+        if self.verbose:
+            margin = f"{mean_margin:.1f}" if mean_margin is not None else "-"
+            print(f"Adaptive tuning: {frame_time * 1000:.1f} ms/frame, margin {margin}, "
+                  f"lost {self._lost} -> quad_decimate {quad_decimate}, threads {nthreads}")
+        for detector in self.scan_detectors:
+            set_detector_params(detector, quad_decimate=quad_decimate)
+        for detector in self.detectors:
+            set_detector_params(detector, nthreads=nthreads)
+        self.quad_decimate, self.nthreads = quad_decimate, nthreads
+        self.adjustments += 1
+
+    def stats(self) -> dict:
+        return {"quad_decimate": self.quad_decimate, "threads": self.nthreads, "adjustments": self.adjustments}
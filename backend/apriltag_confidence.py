@@ -4,6 +4,7 @@ Shows decision margin per detection and lets you adjust threshold at runtime.
 """
 import argparse
 import sys
+import time
 
 try:
     import cv2
@@ -17,6 +18,9 @@ except ImportError as exc:
         "pupil_apriltags is required. Install with: pip install pupil-apriltags"
     ) from exc
 
+from adaptive_tuning import AdaptiveController
+from pipeline_metrics import MetricsLog, PipelineMetrics
+
 
 def parse_source(value):
     try:
@@ -59,26 +63,56 @@ def main():
     parser.add_argument("--quad-decimate", type=float, default=1.0, help="Decimation factor")
     parser.add_argument("--quad-sigma", type=float, default=0.0, help="Gaussian blur sigma")
     parser.add_argument("--refine-edges", action="store_true", help="Refine edges")
+    parser.add_argument("--adaptive", action="store_true",
+                        help="Retune decimation and detector threads at runtime to hold --target-fps")
+    parser.add_argument("--target-fps", type=float, default=30.0, help="Frame rate --adaptive aims for")
+    parser.add_argument("--max-decimate", type=float, default=3.0,
+                        help="Upper bound for quad_decimate in --adaptive mode")
+    parser.add_argument("--metrics-log", help="Append a JSON metrics summary to this rotating log file")
+    parser.add_argument("--metrics-interval", type=float, default=5.0,
+                        help="Seconds between --metrics-log entries")
     args = parser.parse_args()
 
     min_margin = max(0.0, args.min_margin)
     source = parse_source(args.source)
     detector = build_detector(args)
+    controller = None
+    if args.adaptive:
+        controller = AdaptiveController(
+            [detector],
+            target_fps=args.target_fps,
+            min_margin=min_margin,
+            decimate_range=(1.0, args.max_decimate),
+        )
 
     cap = cv2.VideoCapture(source)
     if not cap.isOpened():
         raise SystemExit(f"Could not open video source: {source}")
 
+    metrics = PipelineMetrics()
+    metrics_log = MetricsLog(metrics, args.metrics_log, args.metrics_interval).start() if args.metrics_log else None
+
     window_name = "AprilTag Confidence"
     cv2.namedWindow(window_name, cv2.WINDOW_NORMAL)
 
     while True:
+        read_start = time.perf_counter()
         ok, frame = cap.read()
         if not ok:
             break
 
+        start = time.perf_counter()
         gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        converted = time.perf_counter()
         detections = detector.detect(gray, estimate_tag_pose=False)
+        detect_time = time.perf_counter() - converted
+        if controller is not None:
+            controller.record(detect_time, detections)
+        metrics.observe("capture", start - read_start)
+        metrics.observe("grayscale", converted - start)
+        metrics.observe("detect", detect_time)
+        filtered = sum(1 for det in detections if det.decision_margin < min_margin) if args.filter else 0
+        metrics.observe_detections(detections, filtered, len(detections) - filtered)
 
         for det in detections:
             if args.filter and det.decision_margin < min_margin:
@@ -86,6 +120,8 @@ def main():
             draw_detection(frame, det, min_margin)
 
         overlay = f"min margin: {min_margin:.1f}  ([ / ] to adjust, q to quit)"
+        if controller is not None:
+            overlay += f"  decimate: {controller.quad_decimate:g}  threads: {controller.nthreads}"
         cv2.putText(frame, overlay, (10, 24), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
 
         cv2.imshow(window_name, frame)
@@ -99,6 +135,8 @@ def main():
 
     cap.release()
     cv2.destroyAllWindows()
+    if metrics_log is not None:
+        metrics_log.stop()
 
 
 if __name__ == "__main__":
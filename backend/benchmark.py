@@ -0,0 +1,340 @@
+"""Offline replay and benchmark harness for the AprilTag pipeline.
+
+Feeds a recorded video, or synthetic frames composited from the PNGs in
+``generated_tags/``, through the same detector configuration, FramePipeline
+and tag mapping as camera.py, and reports throughput and accuracy:
+
+    python benchmark.py --synthetic 300 --seed 1 --workers 2
+    python benchmark.py --synthetic 300 --seed 1 --processes 2
+    python benchmark.py --video recording.mp4 --track --json result.json
+
+Synthetic frames place boundary tags 1-4 around a table and move the other
+tags along smooth paths, then apply a random perspective, Gaussian blur and
+sensor noise. Since every tag's true position is known, recall and position
+error are reported as well as fps and p50/p99 latency. Recorded videos have
+no ground truth, so only timing and detection counts are reported for them.
+"""
+import argparse
+import json
+import os
+import threading
+import time
+from functools import partial
+
+import cv2
+import numpy as np
+
+import camera
+from calibration import BOUNDARY_IDS, CalibrationManager
+from frame_pipeline import END_OF_STREAM, FramePipeline
+from shared_frames import ProcessDetector, SharedFrameRing
+
+TAG_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "generated_tags")
+
+
+def load_tag_images(family: str, tag_dir: str = TAG_DIR, size: int = 240) -> dict:
+    """``{tag_id: (image, quad)}``; quad is the tag's black border in image pixels."""
+    tags = {}
+    prefix = f"{family}_id"
+    for name in sorted(os.listdir(tag_dir)):
+        if not (name.startswith(prefix) and name.endswith(".png")):
+            continue
+        image = cv2.imread(os.path.join(tag_dir, name), cv2.IMREAD_GRAYSCALE)
+        image = cv2.resize(image, (size, size), interpolation=cv2.INTER_AREA)
+        ys, xs = np.where(image < 128)
+        x0, x1, y0, y1 = xs.min(), xs.max() + 1, ys.min(), ys.max() + 1
+        quad = np.array([[x0, y0], [x1, y0], [x1, y1], [x0, y1]], dtype=np.float64)
+        tags[int(name[len(prefix):-4])] = (image, quad)
+    return tags
+
+
+class SyntheticScene:
+    """Deterministic synthetic table: fixed boundary tags and moving tags.
+
+    Layout is done on a flat ``table_size`` canvas; the map rectangle is
+    spanned by the inner corners of the boundary tags, so a tag's true
+    normalized position is simply its canvas position inside that rectangle.
+    One random perspective (``tilt`` as a fraction of the frame) maps the
+    canvas to the camera frame for the whole sequence.
+    """
+
+    def __init__(self, family: str = "tag36h11", frame_size=(1280, 720), movable: int = 6, seed: int = 0,
+                 tilt: float = 0.08, blur: float = 0.8, noise: float = 2.0, table_size=(1600, 1000),
+                 boundary_size: int = 120, tag_size: int = 90, fps: float = 30.0):
+        self.rng = np.random.default_rng(seed)
+        self.tags = load_tag_images(family)
+        missing = set(BOUNDARY_IDS) - self.tags.keys()
+        if missing:
+            raise ValueError(f"generated_tags has no {family} images for boundary ids {sorted(missing)}")
+        movable_ids = sorted(self.tags.keys() - set(BOUNDARY_IDS))[:movable]
+
+        self.frame_size = frame_size
+        self.blur = blur
+        self.noise = noise
+        self.fps = fps
+        self.boundary_size = boundary_size
+        self.tag_size = tag_size
+
+        width, height = table_size
+        margin = 40 + boundary_size
+        # Inner corners of the boundary tags, i.e. the map rectangle
+        self.map_rect = (margin, margin, width - margin, height - margin)
+        frame_w, frame_h = frame_size
+        jitter = self.rng.uniform(-tilt, tilt, size=(4, 2)) * np.array([frame_w, frame_h])
+        canvas = np.array([[0, 0], [width, 0], [width, height], [0, height]], dtype=np.float32)
+        target = np.array([[0, 0], [frame_w, 0], [frame_w, frame_h], [0, frame_h]], dtype=np.float64)
+        target = target * 0.9 + np.array([frame_w, frame_h]) * 0.05 + jitter
+        self.homography = cv2.getPerspectiveTransform(canvas, target.astype(np.float32))
+
+        # One grid cell per moving tag so paths never overlap
+        cols = max(1, int(np.ceil(np.sqrt(len(movable_ids) * 1.6))))
+        rows = max(1, int(np.ceil(len(movable_ids) / cols)))
+        cell = np.array([1.0 / cols, 1.0 / rows])
+        self.paths = {}
+        for i, tag_id in enumerate(movable_ids):
+            centre = (np.array([i % cols, i // cols]) + 0.5) * cell
+            self.paths[tag_id] = (
+                centre,
+                self.rng.uniform(0.1, 0.25, 2) * cell,  # amplitude
+                self.rng.uniform(0.1, 0.5, 2),          # frequency (Hz)
+                self.rng.uniform(0, 2 * np.pi, 3),      # phases (x, y, rotation)
+            )
+
+    def _boundary_placements(self):
+        x0, y0, x1, y1 = self.map_rect
+        size = self.boundary_size
+        # Top-left corner of each tag's black square, with the inner corner on the rectangle
+        origins = {1: (x0 - size, y0 - size), 2: (x1, y0 - size), 3: (x1, y1), 4: (x0 - size, y1)}
+        for tag_id in BOUNDARY_IDS:
+            ox, oy = origins[tag_id]
+            yield tag_id, (ox + size / 2, oy + size / 2), size, 0.0
+
+    def _movable_placements(self, t: float):
+        x0, y0, x1, y1 = self.map_rect
+        for tag_id, (centre, amplitude, frequency, phase) in self.paths.items():
+            nx, ny = centre + amplitude * np.sin(2 * np.pi * frequency * t + phase[:2])
+            angle = 0.4 * np.sin(0.3 * t + phase[2])
+            yield tag_id, (x0 + nx * (x1 - x0), y0 + ny * (y1 - y0)), self.tag_size, angle
+
+    def _place(self, tag_id: int, centre, size: float, angle: float):
+        """Homography from the tag PNG to the camera frame."""
+        image, quad = self.tags[tag_id]
+        scale = size / (quad[1, 0] - quad[0, 0])
+        quad_centre = quad.mean(axis=0)
+        cos, sin = np.cos(angle) * scale, np.sin(angle) * scale
+        to_canvas = np.array([
+            [cos, -sin, centre[0] - cos * quad_centre[0] + sin * quad_centre[1]],
+            [sin, cos, centre[1] - sin * quad_centre[0] - cos * quad_centre[1]],
+            [0, 0, 1],
+        ])
+        return self.homography @ to_canvas
+
+    def render(self, index: int):
+        """Return ``(bgr_frame, truth)`` with truth ``{tag_id: {"center", "x", "y"}}``."""
+        t = index / self.fps
+        frame_w, frame_h = self.frame_size
+        out = np.full((frame_h, frame_w), 170, dtype=np.uint8)
+        x0, y0, x1, y1 = self.map_rect
+        truth = {}
+        placements = list(self._boundary_placements()) + list(self._movable_placements(t))
+        for tag_id, centre, size, angle in placements:
+            image, quad = self.tags[tag_id]
+            matrix = self._place(tag_id, centre, size, angle)
+            cv2.warpPerspective(image, matrix, (frame_w, frame_h), dst=out,
+                                flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_TRANSPARENT)
+            projected = cv2.perspectiveTransform(quad.mean(axis=0).reshape(1, 1, 2), matrix).reshape(2)
+            truth[tag_id] = {
+                "center": projected,
+                "x": (centre[0] - x0) / (x1 - x0),
+                "y": (centre[1] - y0) / (y1 - y0),
+            }
+
+        # Noise goes in before the blur: webcam ISPs denoise, and raw per-pixel
+        # noise on a flat table makes the detector far slower than real footage
+        if self.noise > 0:
+            noisy = out.astype(np.float32) + self.rng.normal(0, self.noise, out.shape).astype(np.float32)
+            out = np.clip(noisy, 0, 255).astype(np.uint8)
+        if self.blur > 0:
+            out = cv2.GaussianBlur(out, (0, 0), self.blur)
+        return cv2.cvtColor(out, cv2.COLOR_GRAY2BGR), truth
+
+
+def percentile(values, q: float):
+    return float(np.percentile(values, q)) if len(values) else None
+
+
+def run(frames, truths, args) -> dict:
+    """Replay ``frames`` through a FramePipeline configured like camera.py."""
+    ring = None
+    if args.processes > 0:
+        ring = SharedFrameRing(frames[0].shape[:2], args.processes)
+        make_detect_fn = partial(camera.build_worker_detect_fn, args)
+        detect_fns = [ProcessDetector(ring, slot, make_detect_fn) for slot in range(args.processes)]
+    else:
+        detect_fns = camera.build_detect_fns(args)
+    try:
+        return _replay(frames, truths, args, detect_fns)
+    finally:
+        if ring is not None:
+            for detect_fn in detect_fns:
+                detect_fn.close()
+            ring.close()
+
+
+def _replay(frames, truths, args, detect_fns) -> dict:
+    camera.calibration = CalibrationManager(
+        tolerance=args.calibration_tolerance,
+        smoothing=args.calibration_smoothing,
+        max_hold=args.calibration_hold,
+    )
+    interval = 1.0 / args.feed_fps if args.feed_fps > 0 else 0.0
+    # Unpaced replay hands over the next frame only once a worker has claimed
+    # the previous one, so no frames are dropped and fps is detector-bound
+    claimed = threading.Semaphore(1)
+    position = {"index": 0, "next": 0.0}
+    records = []
+    detect_ms = {}
+    pipeline = None
+
+    def drained() -> bool:
+        stats = pipeline.stats()
+        settled = stats["published"] + stats["stale_results"] + stats["dropped_results"] + stats["dropped_frames"]
+        return settled >= stats["captured"]
+
+    def read_frame():
+        if position["index"] >= len(frames):
+            deadline = time.perf_counter() + 10.0
+            while not drained() and time.perf_counter() < deadline:
+                time.sleep(0.005)
+            return END_OF_STREAM
+        if interval:
+            delay = position["next"] - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            position["next"] = max(position["next"], time.perf_counter()) + interval
+        else:
+            claimed.acquire()
+        frame = frames[position["index"]]
+        position["index"] += 1
+        return frame
+
+    def detect(worker_index, frame):
+        if not interval:
+            claimed.release()
+        start = time.perf_counter()
+        # Process detectors expose their shared-memory slot as ``buffer``
+        buffer = getattr(detect_fns[worker_index], "buffer", None)
+        gray = cv2.cvtColor(frame.image, cv2.COLOR_BGR2GRAY, dst=buffer)
+        detections = detect_fns[worker_index](gray)
+        detect_ms[frame.seq] = (time.perf_counter() - start) * 1000.0
+        return detections
+
+    def publish(frame, detections):
+        found_tags, detected_ids = camera.map_detections(detections, args, args.min_margin, frame.timestamp)
+        records.append((frame.seq, time.time() - frame.timestamp, detections, found_tags))
+
+    start = time.perf_counter()
+    pipeline = FramePipeline(read_frame, detect, publish, workers=len(detect_fns))
+    pipeline.start().join()
+    elapsed = time.perf_counter() - start
+
+    latencies = [latency * 1000.0 for _, latency, _, _ in records]
+    report = {
+        "frames": len(frames),
+        "published": len(records),
+        "elapsed_s": elapsed,
+        "fps": len(records) / elapsed if elapsed else 0.0,
+        "latency_ms_p50": percentile(latencies, 50),
+        "latency_ms_p99": percentile(latencies, 99),
+        "detect_ms_p50": percentile(list(detect_ms.values()), 50),
+        "detect_ms_p99": percentile(list(detect_ms.values()), 99),
+        "tags_per_frame": float(np.mean([len(dets) for _, _, dets, _ in records])) if records else 0.0,
+        "pipeline": pipeline.stats(),
+    }
+    if truths is None:
+        return report
+
+    expected = hits = 0
+    pixel_errors = []
+    map_errors = []
+    for seq, _, detections, found_tags in records:
+        truth = truths[seq - 1]
+        by_id = {int(det.tag_id): det for det in detections}
+        expected += len(truth)
+        for tag_id, true_tag in truth.items():
+            det = by_id.get(tag_id)
+            if det is None:
+                continue
+            hits += 1
+            pixel_errors.append(float(np.linalg.norm(np.asarray(det.center) - true_tag["center"])))
+            mapped = found_tags.get(str(tag_id))
+            if mapped is not None:
+                map_errors.append(float(np.hypot(mapped["x"] - true_tag["x"], mapped["y"] - true_tag["y"])))
+    report.update({
+        "recall": hits / expected if expected else 0.0,
+        "false_positives": sum(
+            len({int(det.tag_id) for det in dets} - truths[seq - 1].keys()) for seq, _, dets, _ in records
+        ),
+        "center_error_px_mean": float(np.mean(pixel_errors)) if pixel_errors else None,
+        "center_error_px_p99": percentile(pixel_errors, 99),
+        "map_error_mean": float(np.mean(map_errors)) if map_errors else None,
+        "map_error_p99": percentile(map_errors, 99),
+    })
+    return report
+
+
+def load_video(path: str, limit: int = 0):
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise SystemExit(f"Could not open video: {path}")
+    frames = []
+    while not limit or len(frames) < limit:
+        ok, frame = cap.read()
+        if not ok:
+            break
+        frames.append(frame)
+    cap.release()
+    return frames
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Replay frames through the AprilTag pipeline and report timings")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--video", help="Recorded video to replay (timing only, no ground truth)")
+    source.add_argument("--synthetic", type=int, metavar="FRAMES", help="Number of synthetic frames")
+    parser.add_argument("--limit", type=int, default=0, help="Replay at most this many video frames")
+    parser.add_argument("--seed", type=int, default=0, help="Synthetic scene seed")
+    parser.add_argument("--size", default="1280x720", help="Synthetic frame size WxH")
+    parser.add_argument("--movable", type=int, default=6, help="Moving tags in the synthetic scene")
+    parser.add_argument("--tilt", type=float, default=0.08, help="Random perspective, fraction of frame size")
+    parser.add_argument("--blur", type=float, default=0.8, help="Gaussian blur sigma (px)")
+    parser.add_argument("--noise", type=float, default=2.0, help="Sensor noise standard deviation")
+    parser.add_argument("--feed-fps", type=float, default=0.0,
+                        help="Deliver frames at this rate like a camera (0 = as fast as possible)")
+    parser.add_argument("--json", help="Also write the report to this file")
+    camera.add_detector_arguments(parser)
+    args = parser.parse_args()
+
+    if args.video:
+        frames, truths = load_video(args.video, args.limit), None
+    else:
+        width, height = (int(v) for v in args.size.lower().split("x"))
+        scene = SyntheticScene(args.family, (width, height), movable=args.movable, seed=args.seed,
+                               tilt=args.tilt, blur=args.blur, noise=args.noise)
+        rendered = [scene.render(i) for i in range(args.synthetic)]
+        frames = [frame for frame, _ in rendered]
+        truths = [truth for _, truth in rendered]
+    if not frames:
+        raise SystemExit("No frames to replay")
+
+    report = run(frames, truths, args)
+    for key, value in report.items():
+        print(f"{key:>22}: {value:.4f}" if isinstance(value, float) else f"{key:>22}: {value}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
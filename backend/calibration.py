@@ -0,0 +1,74 @@
+"""Table calibration: homography from the boundary tags to map space."""
+import cv2
+import numpy as np
+
+BOUNDARY_IDS = (1, 2, 3, 4)
+# Map-space corners for boundary tags 1, 2, 3, 4 (top-left, clockwise)
+MAP_CORNERS = np.array([[0, 0], [1, 0], [1, 1], [0, 1]], dtype=np.float32)
+
+
+class CalibrationManager:
+    """Keeps a smoothed homography and only updates it when the table moves.
+
+    - Boundary corner shifts up to ``tolerance`` pixels are treated as
+      detection jitter and ignored.
+    - Larger shifts are blended in with factor ``smoothing``.
+    - Shifts above ``jump`` pixels (camera or table bumped) are applied at
+      once.
+    - When a boundary tag is missing the last homography stays in use for
+      ``max_hold`` seconds (0 keeps it indefinitely).
+
+    ``map_points`` are the map-space positions of the boundary tags' inner
+    corners, so a camera that only sees part of a large table can use its
+    own four reference tags (e.g. two corners plus two mid-edge tags).
+    """
+
+    def __init__(self, boundary_ids=BOUNDARY_IDS, tolerance: float = 1.5, smoothing: float = 0.5,
+                 jump: float = 25.0, max_hold: float = 5.0, map_points=MAP_CORNERS):
+        if len(boundary_ids) != 4 or len(map_points) != 4:
+            raise ValueError("A homography needs exactly four boundary tags and map points")
+        self.boundary_ids = tuple(boundary_ids)
+        self.map_points = np.asarray(map_points, dtype=np.float32)
+        self.tolerance = tolerance
+        self.smoothing = smoothing
+        self.jump = jump
+        self.max_hold = max_hold
+        self.matrix = None
+        self.updates = 0
+        self._src = None
+        self._last_seen = 0.0
+
+    def update(self, detections_by_id: dict, timestamp: float):
+        """Feed one frame's detections; return the homography to use, or None."""
+        if all(tag_id in detections_by_id for tag_id in self.boundary_ids):
+            boundary = [detections_by_id[tag_id] for tag_id in self.boundary_ids]
+            corners = np.array([det.corners for det in boundary], dtype=np.float32)
+            group_center = np.array([det.center for det in boundary], dtype=np.float32).mean(axis=0)
+            # Innermost corner of each boundary tag, i.e. closest to the group centre
+            nearest = np.linalg.norm(corners - group_center, axis=2).argmin(axis=1)
+            src = corners[np.arange(len(boundary)), nearest]
+            self._apply(src)
+            self._last_seen = timestamp
+        elif self.matrix is not None and self.max_hold and timestamp - self._last_seen > self.max_hold:
+            self.matrix = None
+            self._src = None
+        return self.matrix
+
+    def _apply(self, src):
+        if self._src is None:
+            self._src = src
+        else:
+            shift = float(np.abs(src - self._src).max())
+            if shift <= self.tolerance:
+                return
+            if shift >= self.jump:
+                self._src = src
+            else:
+                self._src = self._src + self.smoothing * (src - self._src)
+        self.matrix = cv2.getPerspectiveTransform(self._src.astype(np.float32), self.map_points)
+        self.updates += 1
+
+    def transform(self, points) -> np.ndarray:
+        """Map an (N, 2) array of pixel points into normalized map space."""
+        points = np.asarray(points, dtype=np.float32).reshape(-1, 1, 2)
+        return cv2.perspectiveTransform(points, self.matrix).reshape(-1, 2)
@@ -1,19 +1,40 @@
 """AprilTag detector with Flask API (pupil_apriltags) and confidence display."""
 import argparse
 import logging
+import multiprocessing
+import queue
 import sys
 import threading
+import time
+from functools import partial
 from typing import Union
 
 import cv2
 import numpy as np
-from flask import Flask, jsonify
+from flask import Flask, Response, jsonify, request
 from flask_cors import CORS
 from pupil_apriltags import Detector
 
-position_lock = threading.Lock()
+from adaptive_tuning import AdaptiveController
+from calibration import BOUNDARY_IDS, CalibrationManager
+from frame_pipeline import FramePipeline, LatestSlot
+from multi_camera import ObservationFusion, load_camera_configs
+from pipeline_metrics import MetricsLog, PipelineMetrics
+from position_stream import MIMETYPES, PositionPublisher
+from roi_tracker import RoiTracker
+from shared_frames import ProcessDetector, SharedFrameRing
+from tag_filter import TagFilter
+
 # relative position (0.0 to 1.0) inside the map formed by ids 1,2,3,4
-current_position = {"tags": {}, "detected_ids": []}
+publisher = PositionPublisher()
+# cached boundary-tag homography, only touched by the publish thread
+calibration = CalibrationManager()
+# smoothing and presence debouncing, replaced from CLI args in main()
+tag_filter = TagFilter()
+# annotated MJPEG preview, only created with --mjpeg
+preview = None
+# stage timings and tag counts for /api/metrics
+metrics = PipelineMetrics()
 
 app = Flask(__name__)
 CORS(app)
@@ -21,8 +42,79 @@ CORS(app)
 
 @app.route('/api/position', methods=['GET'])
 def get_position():
-    with position_lock:
-        return jsonify(current_position)
+    """Latest snapshot, pre-serialized by the publisher.
+
+    ``?since=<seq>&boot=<boot>`` (or ``If-None-Match``) answers 304 with no
+    body when that is still the current snapshot; ``?format=binary`` or
+    ``?format=msgpack`` selects a compact encoding instead of JSON.
+    """
+    current = publisher.current()
+    headers = {'ETag': current.etag, 'X-Position-Seq': str(current.seq), 'X-Position-Boot': current.boot}
+    since = request.args.get('since', type=int)
+    boot = request.args.get('boot')
+    # Exact matches only: a restarted detector counts from 0 again, so an
+    # older client's seq may well be ahead of the current one
+    unchanged = since is not None and since == current.seq and boot in (None, current.boot)
+    if unchanged or request.headers.get('If-None-Match') == current.etag:
+        return Response(status=304, headers=headers)
+
+    fmt = request.args.get('format', 'json')
+    if fmt not in MIMETYPES:
+        return jsonify({"error": f"Unknown format '{fmt}', expected one of {sorted(MIMETYPES)}"}), 400
+    try:
+        body = current.encode(fmt)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 406
+    return Response(body, mimetype=MIMETYPES[fmt], headers=headers)
+
+
+@app.route('/api/position/stream', methods=['GET'])
+def stream_position():
+    """Server-sent events: one message per published change."""
+    return Response(
+        publisher.sse_events(),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """Prometheus text format: stage histograms, tag counts, margins, drops."""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+
+@app.route('/api/preview.mjpg', methods=['GET'])
+def stream_preview():
+    if preview is None:
+        return jsonify({"error": "Preview disabled (start with --mjpeg)"}), 404
+    return Response(preview.stream(), mimetype='multipart/x-mixed-replace; boundary=frame')
+
+
+class MjpegPreview:
+    """Annotated JPEG frames at a capped rate, rendered only for connected clients."""
+
+    def __init__(self, fps: float):
+        self.interval = 1.0 / max(0.1, fps)
+        self._latest = None
+
+    def update(self, frame, detections, min_margin: float):
+        # Reference swap only; rendering happens in the client's thread
+        self._latest = (frame, detections, min_margin)
+
+    def stream(self):
+        last_seq = None
+        while True:
+            started = time.perf_counter()
+            item = self._latest
+            if item is not None and item[0].seq != last_seq:
+                frame, detections, min_margin = item
+                last_seq = frame.seq
+                image = render_preview(frame.image.copy(), detections, min_margin)
+                ok, jpeg = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, 70])
+                if ok:
+                    yield b'--frame\r\nContent-Type: image/jpeg\r\n\r\n' + jpeg.tobytes() + b'\r\n'
+            time.sleep(max(0.0, self.interval - (time.perf_counter() - started)))
 
 
 def run_flask_server():
@@ -41,16 +133,73 @@ def parse_source(value: str) -> Union[int, str]:
         return value
 
 
-def build_detector(args) -> Detector:
+def build_detector(args, quad_decimate: float = None) -> Detector:
     return Detector(
         families=args.family,
         nthreads=args.threads,
-        quad_decimate=args.quad_decimate,
+        quad_decimate=args.quad_decimate if quad_decimate is None else quad_decimate,
         quad_sigma=args.quad_sigma,
         refine_edges=args.refine_edges
     )
 
 
+def build_detect_fns(args, boundary_ids=BOUNDARY_IDS):
+    """One ``detect(gray) -> detections`` callable per worker.
+
+    With ``--track`` each worker gets a RoiTracker: full-resolution ROI
+    detection around known tags and a decimated full scan every
+    ``--full-scan-interval`` frames or after a tag is lost; ``boundary_ids``
+    are the camera's corner tags, which it keeps from the last full scan. With
+    ``--adaptive`` each worker's detectors are retuned at runtime by an
+    AdaptiveController to hold ``--target-fps``.
+    """
+    workers = max(1, args.workers)
+    detect_fns = []
+    for _ in range(workers):
+        if args.track:
+            roi_detector = build_detector(args, quad_decimate=1.0)
+            scan_detector = build_detector(args, quad_decimate=args.full_scan_decimate)
+            detect_fn = RoiTracker(
+                roi_detector,
+                scan_detector,
+                boundary_ids=boundary_ids,
+                full_scan_interval=args.full_scan_interval,
+                padding=args.roi_padding
+            ).detect
+            detectors = [roi_detector, scan_detector]
+        else:
+            scan_detector = build_detector(args)
+            detect_fn = partial(scan_detector.detect, estimate_tag_pose=False)
+            detectors = [scan_detector]
+
+        if args.adaptive:
+            controller = AdaptiveController(
+                detectors,
+                scan_detectors=[scan_detector],
+                target_fps=args.target_fps,
+                workers=workers,
+                min_margin=args.min_margin,
+                decimate_range=(1.0, args.max_decimate)
+            )
+            detect_fn = timed(detect_fn, controller)
+        detect_fns.append(detect_fn)
+    return detect_fns
+
+
+def build_worker_detect_fn(args, boundary_ids=BOUNDARY_IDS):
+    """Single detect callable for a ``--processes`` detector process."""
+    return build_detect_fns(argparse.Namespace(**dict(vars(args), workers=1)), boundary_ids)[0]
+
+
+def timed(detect_fn, controller: AdaptiveController):
+    def detect(gray):
+        start = time.perf_counter()
+        detections = detect_fn(gray)
+        controller.record(time.perf_counter() - start, detections)
+        return detections
+    return detect
+
+
 def draw_detection(frame, det, min_margin: float):
     corners = det.corners.astype(int)
     center = tuple(det.center.astype(int))
@@ -64,115 +213,336 @@ def draw_detection(frame, det, min_margin: float):
     cv2.putText(frame, label, label_pos, cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
 
 
-def detect_and_display(cap: cv2.VideoCapture, detector: Detector, args):
+def render_preview(image, detections, min_margin: float):
+    """Draw detections and the key help overlay onto ``image`` in place."""
+    for det in detections:
+        draw_detection(image, det, min_margin)
+    overlay = f"min margin: {min_margin:.1f}  ([ / ] to adjust, q to quit)"
+    cv2.putText(image, overlay, (10, 24), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
+    return image
+
+
+def map_detections(detections, args, min_margin: float, timestamp: float, manager: CalibrationManager = None):
+    """Normalized positions of movable tags inside the quad formed by ids 1-4.
+
+    The homography comes from ``manager`` (the module-wide ``calibration``
+    by default), which only recomputes it when the boundary tags actually
+    move and keeps the last one while a boundary tag is briefly occluded.
+    """
+    manager = manager or calibration
+    by_id = {}
+    for det in detections:
+        tag_id = int(det.tag_id)
+        if tag_id not in by_id or det.decision_margin > by_id[tag_id].decision_margin:
+            by_id[tag_id] = det
+    detected_ids = [int(det.tag_id) for det in detections]
+
+    if manager.update(by_id, timestamp) is None:
+        return {}, detected_ids
+
+    movable = [
+        det for tag_id, det in by_id.items()
+        if tag_id not in manager.boundary_ids
+        and not (args.filter and det.decision_margin < min_margin)
+    ]
+    if not movable:
+        return {}, detected_ids
+
+    mapped = manager.transform([det.center for det in movable])
+    found_tags = {}
+    for det, (px, py) in zip(movable, mapped.tolist()):
+        tag_id = int(det.tag_id)
+        found_tags[str(tag_id)] = {
+            "x": px,
+            "y": py,
+            "id": tag_id,
+            "margin": float(det.decision_margin)
+        }
+    return found_tags, detected_ids
+
+
+def detect_and_display(cap: cv2.VideoCapture, detect_fns, args):
+    """Run capture, detection and publishing on a FramePipeline; display here.
+
+    OpenCV windows must be driven from the main thread, so this loop only
+    draws the most recent published frame (at most ``--preview-fps`` times
+    per second when set) and handles key presses. With ``--headless`` no
+    window is opened and nothing is drawn unless an MJPEG client asks.
+    """
+    state = {"min_margin": max(0.0, args.min_margin)}
+    display = None if args.headless else LatestSlot()
+    display_interval = 1.0 / args.preview_fps if args.preview_fps > 0 else 0.0
+
+    def read_frame():
+        start = time.perf_counter()
+        ok, frame = cap.read()
+        metrics.observe("capture", time.perf_counter() - start)
+        return frame if ok else None
+
+    def detect(worker_index, frame):
+        start = time.perf_counter()
+        # Process detectors expose their shared-memory slot as ``buffer``
+        buffer = getattr(detect_fns[worker_index], "buffer", None)
+        gray = cv2.cvtColor(frame.image, cv2.COLOR_BGR2GRAY, dst=buffer)
+        converted = time.perf_counter()
+        detections = detect_fns[worker_index](gray)
+        metrics.observe("grayscale", converted - start)
+        metrics.observe("detect", time.perf_counter() - converted)
+        return detections
+
+    def publish(frame, detections):
+        start = time.perf_counter()
+        metrics.observe("queue_age", time.time() - frame.timestamp)
+        min_margin = state["min_margin"]
+        found_tags, detected_ids = map_detections(detections, args, min_margin, frame.timestamp)
+        mapped = time.perf_counter()
+        found_tags, detected_ids = tag_filter.update(found_tags, detected_ids, frame.timestamp)
+        publisher.update(found_tags, detected_ids, frame.timestamp)
+        metrics.observe("homography", mapped - start)
+        metrics.observe("publish", time.perf_counter() - mapped)
+        filtered = sum(1 for det in detections if det.decision_margin < min_margin) if args.filter else 0
+        metrics.observe_detections(detections, filtered, len(found_tags))
+        if preview is not None:
+            preview.update(frame, detections, min_margin)
+        if display is not None:
+            display.put((frame, detections))
+
+    pipeline = FramePipeline(read_frame, detect, publish, workers=len(detect_fns))
+    metrics.add_source("apriltag_pipeline", pipeline.stats)
+
+    if args.headless:
+        pipeline.start()
+        print("Running headless, Ctrl+C to stop")
+        try:
+            while pipeline.running:
+                time.sleep(0.2)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            pipeline.stop()
+            pipeline.join(timeout=1.0)
+            print(f"Pipeline stats: {pipeline.stats()}")
+        cap.release()
+        return
+
     window_name = "AprilTag 36h11 Detector"
     cv2.namedWindow(window_name, cv2.WINDOW_NORMAL)
     cv2.resizeWindow(window_name, 1280, 720)
 
-    boundary_ids = [1, 2, 3, 4]
-    min_margin = max(0.0, args.min_margin)
-
-    while True:
-        ok, frame = cap.read()
-        if not ok:
-            print("Failed to read from camera/stream. Exiting.")
-            break
-
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        detections = detector.detect(gray, estimate_tag_pose=False)
-
-        centers = {}
-        all_corners_dict = {}
-        found_tags = {}
-        detected_ids = []
-
-        for det in detections:
-            tag_id = int(det.tag_id)
-            detected_ids.append(tag_id)
-            all_corners_dict[tag_id] = det.corners
-            centers[tag_id] = det.center
-            draw_detection(frame, det, min_margin)
-
-        if all(cid in centers for cid in boundary_ids):
-            group_cx = sum(centers[cid][0] for cid in boundary_ids) / 4.0
-            group_cy = sum(centers[cid][1] for cid in boundary_ids) / 4.0
-            group_center = np.array([group_cx, group_cy])
-
-            map_src_pts = []
-            for cid in boundary_ids:
-                c_corners = all_corners_dict[cid]
-                best_corner = None
-                min_dist = float('inf')
-                for pt in c_corners:
-                    dist = np.linalg.norm(pt - group_center)
-                    if dist < min_dist:
-                        min_dist = dist
-                        best_corner = pt
-                map_src_pts.append(best_corner)
-
-            src_pts = np.array(map_src_pts, dtype="float32")
-            dst_pts = np.array([
-                [0, 0],
-                [1, 0],
-                [1, 1],
-                [0, 1]
-            ], dtype="float32")
-
-            M = cv2.getPerspectiveTransform(src_pts, dst_pts)
-
-            for det in detections:
-                tag_id = int(det.tag_id)
-                if tag_id in boundary_ids:
-                    continue
-                if args.filter and det.decision_margin < min_margin:
-                    continue
-
-                tracked_center = np.array([[det.center]], dtype="float32")
-                pts_transformed = cv2.perspectiveTransform(tracked_center, M)
-                px = float(pts_transformed[0][0][0])
-                py = float(pts_transformed[0][0][1])
-                found_tags[str(tag_id)] = {
-                    "x": px,
-                    "y": py,
-                    "id": tag_id,
-                    "margin": float(det.decision_margin)
-                }
-
-        with position_lock:
-            current_position["tags"] = found_tags
-            current_position["detected_ids"] = detected_ids
-
-        overlay = f"min margin: {min_margin:.1f}  ([ / ] to adjust, q to quit)"
-        cv2.putText(frame, overlay, (10, 24), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
-
-        cv2.imshow(window_name, frame)
-
-        key = cv2.waitKey(1) & 0xFF
-        if key in (ord("q"), 27):
-            break
-        if key == ord("["):
-            min_margin = max(0.0, min_margin - 1.0)
-        if key == ord("]"):
-            min_margin += 1.0
+    pipeline.start()
+    last_shown = 0.0
+    try:
+        while pipeline.running:
+            item = display.take(timeout=0.05)
+            now = time.perf_counter()
+            if item is not None and now - last_shown >= display_interval:
+                frame, detections = item
+                # MjpegPreview copies the same frame on its own thread; never draw on it
+                cv2.imshow(window_name, render_preview(frame.image.copy(), detections, state["min_margin"]))
+                last_shown = now
+
+            key = cv2.waitKey(1) & 0xFF
+            if key in (ord("q"), 27):
+                break
+            if key == ord("["):
+                state["min_margin"] = max(0.0, state["min_margin"] - 1.0)
+            if key == ord("]"):
+                state["min_margin"] += 1.0
+    finally:
+        pipeline.stop()
+        pipeline.join(timeout=1.0)
+        print(f"Pipeline stats: {pipeline.stats()}")
 
     cap.release()
     cv2.destroyAllWindows()
 
 
-def main() -> int:
-    parser = argparse.ArgumentParser(description="AprilTag detector with confidence display")
-    parser.add_argument("--source", default="0", help="Camera index or stream URL")
+def source_process(index: int, config: dict, args, observations, stop):
+    """Capture, detect and map one camera of a multi-camera setup.
+
+    Runs in its own process; mapped tags go to ``observations`` as
+    ``(index, timestamp, tags, detected_ids)`` and ``(index, None, None, None)``
+    marks the end of the source.
+    """
+    source = parse_source(str(config["source"]))
+    cap = cv2.VideoCapture(source)
+    if not cap.isOpened():
+        print(f"Could not open video source: {source}")
+        observations.put((index, None, None, None))
+        return
+
+    manager = CalibrationManager(
+        config["boundary_ids"],
+        tolerance=args.calibration_tolerance,
+        smoothing=args.calibration_smoothing,
+        max_hold=args.calibration_hold,
+        map_points=config["map_points"]
+    )
+    detect_fns = build_detect_fns(args, config["boundary_ids"])
+
+    def read_frame():
+        if stop.is_set():
+            return None
+        ok, frame = cap.read()
+        return frame if ok else None
+
+    def detect(worker_index, frame):
+        gray = cv2.cvtColor(frame.image, cv2.COLOR_BGR2GRAY)
+        return detect_fns[worker_index](gray)
+
+    def publish(frame, detections):
+        found_tags, detected_ids = map_detections(detections, args, args.min_margin, frame.timestamp, manager)
+        try:
+            observations.put_nowait((index, frame.timestamp, found_tags, detected_ids))
+        except queue.Full:
+            pass
+
+    pipeline = FramePipeline(read_frame, detect, publish, workers=len(detect_fns)).start()
+    try:
+        pipeline.join()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        pipeline.stop()
+        cap.release()
+        print(f"Camera {index} ({source}) stats: {pipeline.stats()}")
+        observations.put((index, None, None, None))
+
+
+def run_multi_camera(configs: list, args):
+    """Detect on every camera in its own process and publish fused positions."""
+    context = multiprocessing.get_context("spawn")
+    observations = context.Queue(maxsize=64 * len(configs))
+    stop = context.Event()
+    processes = [
+        context.Process(target=source_process, args=(i, config, args, observations, stop),
+                        name=f"camera-{i}", daemon=True)
+        for i, config in enumerate(configs)
+    ]
+    fusion = ObservationFusion(
+        len(configs),
+        max_age=args.max_observation_age,
+        ignore_ids={tag_id for config in configs for tag_id in config["boundary_ids"]}
+    )
+    for process in processes:
+        process.start()
+
+    print(f"Running {len(configs)} cameras headless, Ctrl+C to stop")
+    running = len(processes)
+    try:
+        while running:
+            try:
+                index, timestamp, found_tags, detected_ids = observations.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            if timestamp is None:
+                running -= 1
+                continue
+            start = time.perf_counter()
+            metrics.observe("queue_age", time.time() - timestamp)
+            found_tags, detected_ids, timestamp = fusion.update(index, timestamp, found_tags, detected_ids)
+            found_tags, detected_ids = tag_filter.update(found_tags, detected_ids, timestamp)
+            publisher.update(found_tags, detected_ids, timestamp)
+            metrics.observe("publish", time.perf_counter() - start)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        for process in processes:
+            process.join(timeout=2.0)
+
+
+def add_detector_arguments(parser: argparse.ArgumentParser):
+    """Detection and calibration options, shared with benchmark.py."""
     parser.add_argument("--family", default="tag36h11", help="Tag family")
     parser.add_argument("--min-margin", type=float, default=20.0, help="Decision margin threshold")
     parser.add_argument("--filter", action="store_true", help="Hide detections below threshold")
     parser.add_argument("--threads", type=int, default=2, help="Detector threads")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Parallel detection workers, each with its own detector")
+    parser.add_argument("--processes", type=int, default=0,
+                        help="Detect in this many processes fed through shared memory (overrides --workers)")
     parser.add_argument("--quad-decimate", type=float, default=1.0, help="Decimation factor")
     parser.add_argument("--quad-sigma", type=float, default=0.0, help="Gaussian blur sigma")
     parser.add_argument("--refine-edges", action="store_true", help="Refine edges")
+    parser.add_argument("--track", action="store_true",
+                        help="Detect in ROIs around known tags between full-frame scans")
+    parser.add_argument("--full-scan-interval", type=int, default=10,
+                        help="Frames between full-frame scans in --track mode")
+    parser.add_argument("--full-scan-decimate", type=float, default=2.0,
+                        help="Decimation factor for full-frame scans in --track mode")
+    parser.add_argument("--roi-padding", type=float, default=1.0,
+                        help="ROI padding around a tag, as a fraction of its size")
+    parser.add_argument("--adaptive", action="store_true",
+                        help="Retune decimation and detector threads at runtime to hold --target-fps")
+    parser.add_argument("--target-fps", type=float, default=30.0, help="Frame rate --adaptive aims for")
+    parser.add_argument("--max-decimate", type=float, default=3.0,
+                        help="Upper bound for quad_decimate in --adaptive mode")
+    parser.add_argument("--calibration-tolerance", type=float, default=1.5,
+                        help="Boundary corner movement (px) ignored as jitter")
+    parser.add_argument("--calibration-smoothing", type=float, default=0.5,
+                        help="Blend factor for boundary movements above the tolerance")
+    parser.add_argument("--calibration-hold", type=float, default=5.0,
+                        help="Seconds to keep the homography while a boundary tag is missing (0 = forever)")
+
+
+def main() -> int:
+    global preview, tag_filter
+    parser = argparse.ArgumentParser(description="AprilTag detector with confidence display")
+    parser.add_argument("--source", nargs="+", default=["0"],
+                        help="Camera index or stream URL; several for multi-camera detection")
+    parser.add_argument("--cameras", help="JSON camera layout with per-camera boundary tags and map points")
+    parser.add_argument("--max-observation-age", type=float, default=0.25,
+                        help="Seconds a camera's last observation still counts when fusing cameras")
+    add_detector_arguments(parser)
+    parser.add_argument("--headless", action="store_true", help="No window and no drawing")
+    parser.add_argument("--preview-fps", type=float, default=0.0,
+                        help="Cap preview rendering rate (0 = every published frame, MJPEG default 5)")
+    parser.add_argument("--mjpeg", action="store_true",
+                        help="Serve annotated preview at /api/preview.mjpg")
+    parser.add_argument("--stream-threshold", type=float, default=0.002,
+                        help="Minimum normalized movement before a new position is streamed")
+    parser.add_argument("--metrics-log", help="Append a JSON metrics summary to this rotating log file")
+    parser.add_argument("--metrics-interval", type=float, default=5.0,
+                        help="Seconds between --metrics-log entries")
+    parser.add_argument("--appear-frames", type=int, default=2,
+                        help="Consecutive frames a tag must be seen before it is published")
+    parser.add_argument("--disappear-frames", type=int, default=5,
+                        help="Consecutive frames a tag must be missed before it is removed")
+    parser.add_argument("--move-epsilon", type=float, default=0.002,
+                        help="Filtered movement (normalized) below which a tag's position is held")
+    parser.add_argument("--euro-min-cutoff", type=float, default=1.0,
+                        help="One-Euro filter minimum cutoff (Hz); lower = smoother when still")
+    parser.add_argument("--euro-beta", type=float, default=5.0,
+                        help="One-Euro filter speed coefficient; higher = less lag when moving")
     args = parser.parse_args()
 
-    source = parse_source(args.source)
-    detector = build_detector(args)
+    configs = load_camera_configs(args.source, args.cameras)
+    publisher.threshold = args.stream_threshold
+    calibration.tolerance = args.calibration_tolerance
+    calibration.smoothing = args.calibration_smoothing
+    calibration.max_hold = args.calibration_hold
+    tag_filter = TagFilter(args.appear_frames, args.disappear_frames, args.move_epsilon,
+                           args.euro_min_cutoff, args.euro_beta)
+    metrics_log = MetricsLog(metrics, args.metrics_log, args.metrics_interval).start() if args.metrics_log else None
+
+    if len(configs) > 1:
+        if args.mjpeg or not args.headless:
+            print("Multiple cameras always run headless; no preview window or MJPEG stream")
+        server_thread = threading.Thread(target=run_flask_server, daemon=True)
+        server_thread.start()
+        try:
+            run_multi_camera(configs, args)
+        finally:
+            if metrics_log is not None:
+                metrics_log.stop()
+        return 0
+
+    source = parse_source(str(configs[0]["source"]))
+    calibration.boundary_ids = tuple(configs[0]["boundary_ids"])
+    calibration.map_points = np.asarray(configs[0]["map_points"], dtype=np.float32)
+    if args.mjpeg:
+        preview = MjpegPreview(args.preview_fps or 5.0)
 
     server_thread = threading.Thread(target=run_flask_server, daemon=True)
     server_thread.start()
@@ -182,11 +552,31 @@ def main() -> int:
         print(f"Could not open video source: {source}")
         return 1
 
+    ring = None
+    if args.processes > 0:
+        ok, first = cap.read()
+        if not ok:
+            print(f"Could not read from video source: {source}")
+            return 1
+        ring = SharedFrameRing(first.shape[:2], args.processes)
+        make_detect_fn = partial(build_worker_detect_fn, args, calibration.boundary_ids)
+        detect_fns = [ProcessDetector(ring, slot, make_detect_fn) for slot in range(args.processes)]
+        print(f"Detecting in {args.processes} processes via shared memory {ring.spec()[0]}")
+    else:
+        detect_fns = build_detect_fns(args, calibration.boundary_ids)
+
     try:
-        detect_and_display(cap, detector, args)
+        detect_and_display(cap, detect_fns, args)
     finally:
         cap.release()
-        cv2.destroyAllWindows()
+        if metrics_log is not None:
+            metrics_log.stop()
+        if ring is not None:
+            for detect_fn in detect_fns:
+                detect_fn.close()
+            ring.close()
+        if not args.headless:
+            cv2.destroyAllWindows()
 
     return 0
 
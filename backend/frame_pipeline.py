@@ -0,0 +1,186 @@
+"""Threaded capture -> detection -> publish pipeline for the AprilTag detector.
+
+The capture thread only ever keeps the newest frame (older unclaimed frames
+are dropped), detection workers each claim the next frame, and a single
+publisher thread receives results in frame order, discarding results that
+arrive after a newer frame has already been published. Latency is thus
+bounded by roughly one detection time instead of the driver's queue depth.
+"""
+import threading
+import time
+from collections import deque, namedtuple
+
+Frame = namedtuple("Frame", ["seq", "timestamp", "image"])
+END_OF_STREAM = object()  # returned by ``read_frame`` when a finite source is done
+
+
+class LatestSlot:
+    """Single-item mailbox: ``put`` replaces any unclaimed item."""
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._item = None
+        self._closed = False
+        self.dropped = 0
+
+    def put(self, item):
+        with self._condition:
+            if self._item is not None:
+                self.dropped += 1
+            self._item = item
+            self._condition.notify()
+
+    def take(self, timeout: float = None):
+        """Claim the current item; None on timeout or once closed and empty."""
+        with self._condition:
+            self._condition.wait_for(lambda: self._item is not None or self._closed, timeout)
+            item = self._item
+            self._item = None
+            return item
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+
+class DropOldestQueue:
+    """Bounded FIFO that discards its oldest entry instead of blocking."""
+
+    def __init__(self, maxsize: int):
+        self._condition = threading.Condition()
+        self._items = deque()
+        self._maxsize = maxsize
+        self._closed = False
+        self.dropped = 0
+
+    def put(self, item):
+        with self._condition:
+            self._items.append(item)
+            while len(self._items) > self._maxsize:
+                self._items.popleft()
+                self.dropped += 1
+            self._condition.notify()
+
+    def get(self, timeout: float = None):
+        with self._condition:
+            self._condition.wait_for(lambda: self._items or self._closed, timeout)
+            return self._items.popleft() if self._items else None
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+
+class FramePipeline:
+    """Run ``read_frame`` / ``detect`` / ``publish`` on separate threads.
+
+    - ``read_frame()`` returns the next image, None when the source fails, or
+      ``END_OF_STREAM`` once a finite source (e.g. a replay) is exhausted.
+    - ``detect(worker_index, frame)`` runs on one of ``workers`` threads and
+      must only touch per-worker state (e.g. its own Detector).
+    - ``publish(frame, result)`` runs on the publisher thread, in frame order.
+
+    An exception from ``detect`` or ``publish`` is logged and skips that
+    frame; one from ``read_frame`` stops the pipeline like the end of input.
+    """
+
+    def __init__(self, read_frame, detect, publish, workers: int = 1, result_queue_size: int = 4):
+        self._read_frame = read_frame
+        self._detect = detect
+        self._publish = publish
+        self._frames = LatestSlot()
+        self._results = DropOldestQueue(result_queue_size)
+        self._stop = threading.Event()
+        self._threads = [threading.Thread(target=self._capture_loop, name="capture", daemon=True)]
+        self._threads += [
+            threading.Thread(target=self._detect_loop, args=(i,), name=f"detect-{i}", daemon=True)
+            for i in range(max(1, workers))
+        ]
+        self._threads.append(threading.Thread(target=self._publish_loop, name="publish", daemon=True))
+        self.captured = 0
+        self.published = 0
+        self.stale = 0
+        self.errors = 0
+
+    @property
+    def running(self) -> bool:
+        return not self._stop.is_set()
+
+    def start(self):
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._frames.close()
+        self._results.close()
+
+    def join(self, timeout: float = None):
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def stats(self) -> dict:
+        return {
+            "captured": self.captured,
+            "published": self.published,
+            "dropped_frames": self._frames.dropped,
+            "dropped_results": self._results.dropped,
+            "stale_results": self.stale,
+            "errors": self.errors,
+        }
+
+    def _error(self, stage: str, frame, error: Exception):
+        self.errors += 1
+        print(f"{stage} failed on frame {frame.seq}: {error!r}")
+
+    def _capture_loop(self):
+        seq = 0
+        try:
+            while self.running:
+                image = self._read_frame()
+                if image is END_OF_STREAM:
+                    break
+                if image is None:
+                    print("Failed to read from camera/stream. Exiting.")
+                    break
+                seq += 1
+                self.captured = seq
+                self._frames.put(Frame(seq, time.time(), image))
+        except Exception as e:
+            print(f"Capture failed: {e!r}")
+        finally:
+            self.stop()
+
+    def _detect_loop(self, worker_index: int):
+        while self.running:
+            frame = self._frames.take(timeout=0.5)
+            if frame is None:
+                continue
+            try:
+                result = self._detect(worker_index, frame)
+            except Exception as e:
+                self._error("Detection", frame, e)
+                continue
+            self._results.put((frame, result))
+
+    def _publish_loop(self):
+        last_seq = 0
+        while self.running:
+            item = self._results.get(timeout=0.5)
+            if item is None:
+                continue
+            frame, result = item
+            # With several workers a slow frame can finish after a newer one
+            if frame.seq <= last_seq:
+                self.stale += 1
+                continue
+            last_seq = frame.seq
+            try:
+                self._publish(frame, result)
+            except Exception as e:
+                self._error("Publish", frame, e)
+                continue
+            self.published += 1
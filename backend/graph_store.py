@@ -0,0 +1,327 @@
+"""On-disk store for street networks used by the map server.
+
+Each network is saved as a directory of plain .npy arrays plus a small
+meta.json, keyed by place, network type and store version. Arrays are
+loaded with memory-mapping so server startup does not depend on OSM.
+"""
+import argparse
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+from collections import namedtuple
+
+import numpy as np
+
+GRAPH_STORE_VERSION = 1
+DEFAULT_STORE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'cache', 'graphs')
+DEFAULT_PLACE = "Palaiseau, France"
+NETWORK_TYPES = ("walk", "bike")
+
+ARRAY_NAMES = (
+    "node_ids",
+    "node_x",
+    "node_y",
+    "edge_u",
+    "edge_v",
+    "edge_length",
+    "geom_offsets",
+    "geom_coords",
+)
+
+CSR_ARRAY_NAMES = ("csr_offsets", "csr_targets", "csr_lengths", "csr_edges")
+
+# Outgoing adjacency in compressed sparse row form: the edges leaving node i
+# occupy slots offsets[i]:offsets[i + 1]; ``edges`` maps a slot back to the
+# GraphData edge index (for geometry lookups).
+CSRGraph = namedtuple("CSRGraph", ["offsets", "targets", "lengths", "edges"])
+
+
+class GraphData:
+    """Array view of a street network.
+
+    Nodes are addressed by their index into ``node_ids``; edges are directed
+    (``edge_u`` -> ``edge_v``) and carry a length in metres plus a polyline
+    stored as ``geom_coords[geom_offsets[i]:geom_offsets[i + 1]]``.
+    """
+
+    def __init__(self, arrays, meta):
+        missing = [name for name in ARRAY_NAMES if name not in arrays]
+        if missing:
+            raise ValueError(f"Graph data missing arrays: {', '.join(missing)}")
+        self.arrays = arrays
+        self.meta = meta
+        for name in ARRAY_NAMES:
+            setattr(self, name, arrays[name])
+        self.path = None
+        self._csr = None
+        self._index_of = None
+
+    @property
+    def num_nodes(self) -> int:
+        return int(len(self.node_ids))
+
+    @property
+    def num_edges(self) -> int:
+        return int(len(self.edge_u))
+
+    @property
+    def csr(self) -> CSRGraph:
+        """Outgoing CSR adjacency, read from the store when saved alongside."""
+        if self._csr is None:
+            if not all(name in self.arrays for name in CSR_ARRAY_NAMES):
+                self.arrays.update(build_csr_arrays(self))
+            self._csr = CSRGraph(*(self.arrays[name] for name in CSR_ARRAY_NAMES))
+        return self._csr
+
+    def node_index(self, node_id) -> int:
+        if self._index_of is None:
+            self._index_of = {nid: i for i, nid in enumerate(self.node_ids.tolist())}
+        return self._index_of[node_id]
+
+    def edge_coords(self, edge_index: int) -> np.ndarray:
+        start = int(self.geom_offsets[edge_index])
+        end = int(self.geom_offsets[edge_index + 1])
+        return self.geom_coords[start:end]
+
+    def to_networkx(self):
+        """Rebuild a lightweight MultiDiGraph (lengths only, EPSG:4326)."""
+        import networkx as nx
+
+        graph = nx.MultiDiGraph(crs="epsg:4326", place=self.meta.get("place"),
+                                network_type=self.meta.get("network_type"))
+        node_ids = self.node_ids.tolist()
+        xs = self.node_x.tolist()
+        ys = self.node_y.tolist()
+        graph.add_nodes_from((nid, {"x": x, "y": y}) for nid, x, y in zip(node_ids, xs, ys))
+        graph.add_edges_from(
+            (node_ids[u], node_ids[v], {"length": length})
+            for u, v, length in zip(self.edge_u.tolist(), self.edge_v.tolist(), self.edge_length.tolist())
+        )
+        return graph
+
+
+def build_csr_arrays(data: GraphData) -> dict:
+    order = np.argsort(data.edge_u, kind="stable")
+    counts = np.bincount(data.edge_u, minlength=data.num_nodes)
+    offsets = np.zeros(data.num_nodes + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    return {
+        "csr_offsets": offsets,
+        "csr_targets": np.asarray(data.edge_v)[order].astype(np.int32),
+        "csr_lengths": np.asarray(data.edge_length)[order].astype(np.float64),
+        "csr_edges": order.astype(np.int32),
+    }
+
+
+def graph_data_from_networkx(graph, place: str, network_type: str) -> GraphData:
+    """Convert an OSMnx MultiDiGraph (unprojected) into GraphData."""
+    node_ids = np.fromiter(graph.nodes, dtype=np.int64, count=len(graph.nodes))
+    index_of = {nid: i for i, nid in enumerate(node_ids.tolist())}
+    node_x = np.array([graph.nodes[n]["x"] for n in node_ids.tolist()], dtype=np.float64)
+    node_y = np.array([graph.nodes[n]["y"] for n in node_ids.tolist()], dtype=np.float64)
+
+    edge_u = []
+    edge_v = []
+    edge_length = []
+    geom_offsets = [0]
+    geom_coords = []
+    for u, v, data in graph.edges(data=True):
+        ui = index_of[u]
+        vi = index_of[v]
+        edge_u.append(ui)
+        edge_v.append(vi)
+        edge_length.append(float(data.get("length", 0.0)))
+        geometry = data.get("geometry")
+        if geometry is not None:
+            coords = [(float(x), float(y)) for x, y in geometry.coords]
+        else:
+            coords = [(node_x[ui], node_y[ui]), (node_x[vi], node_y[vi])]
+        geom_coords.extend(coords)
+        geom_offsets.append(len(geom_coords))
+
+    arrays = {
+        "node_ids": node_ids,
+        "node_x": node_x,
+        "node_y": node_y,
+        "edge_u": np.array(edge_u, dtype=np.int32),
+        "edge_v": np.array(edge_v, dtype=np.int32),
+        "edge_length": np.array(edge_length, dtype=np.float64),
+        "geom_offsets": np.array(geom_offsets, dtype=np.int64),
+        "geom_coords": np.array(geom_coords, dtype=np.float64).reshape(-1, 2),
+    }
+    return GraphData(arrays, _build_meta(place, network_type, arrays))
+
+
+def fixture_graph(network_type: str = "walk", rows: int = 12, cols: int = 12,
+                  spacing: float = 60.0, origin=(48.713, 2.20)) -> GraphData:
+    """Small synthetic grid around Palaiseau, usable without network access."""
+    lat0, lon0 = origin
+    dlat = spacing / 111320.0
+    dlon = spacing / (111320.0 * np.cos(np.radians(lat0)))
+
+    node_ids = np.arange(1, rows * cols + 1, dtype=np.int64)
+    grid_r, grid_c = np.divmod(np.arange(rows * cols), cols)
+    node_x = lon0 + grid_c * dlon
+    node_y = lat0 + grid_r * dlat
+
+    pairs = []
+    for r in range(rows):
+        for c in range(cols):
+            i = r * cols + c
+            if c + 1 < cols:
+                pairs.append((i, i + 1))
+            if r + 1 < rows:
+                pairs.append((i, i + cols))
+    pairs = np.array(pairs, dtype=np.int32)
+    edge_u = np.concatenate([pairs[:, 0], pairs[:, 1]])
+    edge_v = np.concatenate([pairs[:, 1], pairs[:, 0]])
+    geom_coords = np.stack([node_x[edge_u], node_y[edge_u], node_x[edge_v], node_y[edge_v]], axis=1).reshape(-1, 2)
+
+    arrays = {
+        "node_ids": node_ids,
+        "node_x": node_x.astype(np.float64),
+        "node_y": node_y.astype(np.float64),
+        "edge_u": edge_u,
+        "edge_v": edge_v,
+        "edge_length": np.full(len(edge_u), spacing, dtype=np.float64),
+        "geom_offsets": np.arange(0, 2 * len(edge_u) + 1, 2, dtype=np.int64),
+        "geom_coords": geom_coords,
+    }
+    return GraphData(arrays, _build_meta("fixture", network_type, arrays))
+
+
+def _build_meta(place: str, network_type: str, arrays) -> dict:
+    return {
+        "place": place,
+        "network_type": network_type,
+        "version": GRAPH_STORE_VERSION,
+        "nodes": int(len(arrays["node_ids"])),
+        "edges": int(len(arrays["edge_u"])),
+        "created_at": time.time(),
+    }
+
+
+def store_key(place: str, network_type: str) -> str:
+    slug = re.sub(r"[^a-z0-9]+", "-", place.lower()).strip("-")
+    return f"{slug}-{network_type}-v{GRAPH_STORE_VERSION}"
+
+
+def store_path(place: str, network_type: str, store_dir: str = DEFAULT_STORE_DIR) -> str:
+    return os.path.join(store_dir, store_key(place, network_type))
+
+
+def save_graph_data(data: GraphData, path: str):
+    """Write arrays and meta.json into ``path`` atomically (tmp dir + rename)."""
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    if os.path.exists(tmp_path):
+        shutil.rmtree(tmp_path)
+    os.makedirs(tmp_path)
+    for name, array in data.arrays.items():
+        np.save(os.path.join(tmp_path, f"{name}.npy"), np.ascontiguousarray(array))
+    with open(os.path.join(tmp_path, 'meta.json'), 'w') as f:
+        json.dump(data.meta, f, indent=2)
+    if os.path.exists(path):
+        shutil.rmtree(path)
+    os.rename(tmp_path, path)
+
+
+def load_graph_data(path: str, mmap: bool = True) -> GraphData:
+    with open(os.path.join(path, 'meta.json'), 'r') as f:
+        meta = json.load(f)
+    if meta.get("version") != GRAPH_STORE_VERSION:
+        raise ValueError(f"Graph store version mismatch in {path}")
+    mmap_mode = 'r' if mmap else None
+    arrays = {}
+    for entry in os.scandir(path):
+        if entry.name.endswith('.npy'):
+            arrays[entry.name[:-4]] = np.load(entry.path, mmap_mode=mmap_mode)
+    data = GraphData(arrays, meta)
+    data.path = path
+    return data
+
+
+def save_derived_arrays(data: GraphData, arrays: dict):
+    """Attach extra arrays to ``data`` and, for stored graphs, write them to disk.
+
+    Every server process may derive the same arrays at startup, so each
+    writes through its own temp file and leaves arrays another process
+    already stored in place (derived arrays are deterministic).
+    """
+    data.arrays.update(arrays)
+    if data.path is None:
+        return
+    for name, array in arrays.items():
+        path = os.path.join(data.path, f"{name}.npy")
+        if os.path.exists(path):
+            continue
+        fd, tmp_file = tempfile.mkstemp(dir=data.path, prefix=f".{name}.", suffix=".npy.tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.save(f, np.ascontiguousarray(array))
+            os.replace(tmp_file, path)
+        except BaseException:
+            try:
+                os.remove(tmp_file)
+            except OSError:
+                pass
+            raise
+
+
+def load_derived_arrays(data: GraphData, names):
+    """Arrays ``names`` as stored next to ``data`` (e.g. by another process), or None."""
+    if data.path is None:
+        return None
+    paths = {name: os.path.join(data.path, f"{name}.npy") for name in names}
+    if not all(os.path.exists(path) for path in paths.values()):
+        return None
+    arrays = {name: np.load(path, mmap_mode='r') for name, path in paths.items()}
+    data.arrays.update(arrays)
+    return arrays
+
+
+def download_graph_data(place: str, network_type: str) -> GraphData:
+    import osmnx as ox
+
+    graph = ox.graph_from_place(place, network_type=network_type)
+    return graph_data_from_networkx(graph, place, network_type)
+
+
+def get_graph_data(place: str = DEFAULT_PLACE, network_type: str = "walk", refresh: bool = False,
+                   store_dir: str = DEFAULT_STORE_DIR) -> GraphData:
+    """Load a network from the store, downloading it only if absent or ``refresh`` is set."""
+    path = store_path(place, network_type, store_dir)
+    if not refresh and os.path.exists(os.path.join(path, 'meta.json')):
+        try:
+            return load_graph_data(path)
+        except Exception as e:
+            print(f"Graph store entry {path} unreadable, rebuilding: {e}")
+
+    data = download_graph_data(place, network_type)
+    data.arrays.update(build_csr_arrays(data))
+    os.makedirs(store_dir, exist_ok=True)
+    save_graph_data(data, path)
+    return load_graph_data(path)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Build or refresh the on-disk street network store")
+    parser.add_argument("--place", default=DEFAULT_PLACE, help="Place name passed to OSMnx")
+    parser.add_argument("--network-type", action="append", choices=NETWORK_TYPES,
+                        help="Network type to build (repeatable, default: all)")
+    parser.add_argument("--store-dir", default=DEFAULT_STORE_DIR, help="Store directory")
+    parser.add_argument("--refresh", action="store_true", help="Re-download even if cached")
+    args = parser.parse_args()
+
+    for network_type in args.network_type or NETWORK_TYPES:
+        start = time.perf_counter()
+        data = get_graph_data(args.place, network_type, refresh=args.refresh, store_dir=args.store_dir)
+        elapsed = time.perf_counter() - start
+        print(f"{network_type}: {data.num_nodes} nodes, {data.num_edges} edges ({elapsed:.2f}s)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
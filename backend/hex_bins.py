@@ -0,0 +1,349 @@
+"""Hexagonal density bins for drawn survey answers.
+
+Points, lines and polygons answering one question are projected to local
+metres (equirectangular around a rounded project origin, like the snapping
+index) and assigned to pointy-top hexagons whose size follows the map zoom.
+A cell's ``count`` is the number of features touching it: lines are
+densified to half a cell, polygons add every cell whose centre they contain
+plus the cells along their outline. Each feature counts once per cell, so a
+long corridor drawn by one participant does not outweigh ten short ones.
+Polygon interiors are tested in chunks of at most ``POLYGON_CHUNK_CELLS``
+candidate cells and folded into running per-cell counts, which bounds memory
+when someone outlines a whole neighbourhood at the finest zoom.
+
+``DensityBins`` computes every zoom level of a question at once and caches
+the encoded FeatureCollections under ``projects/<id>/.bins/``, keyed by the
+response store version (generation and revision) and the sticker
+``.geojson`` files in ``answers/``.
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+
+import numpy as np
+import shapely
+from shapely.geometry import shape
+
+from backend.json_writer import write_atomic
+from backend.results_summary import GEOMETRY_GROUPS
+
+METERS_PER_DEGREE = 111320.0
+EARTH_METERS_PER_PIXEL = 156543.03392  # web-mercator ground resolution at zoom 0, equator
+HEX_PIXELS = 12.0  # cell circumradius on screen
+ZOOM_LEVELS = tuple(range(12, 19))  # workshop maps sit around 15-17
+POLYGON_CHUNK_CELLS = 20000  # candidate cells tested against a polygon at once
+POLYGON_FOLD_CELLS = 1_000_000  # buffered polygon cells before folding into counts
+STALE_BINS_SECONDS = 60.0  # age after which cached levels of an older key are deleted
+KINDS = ("points", "lines", "polygons")
+SQRT3 = np.sqrt(3.0)
+HEX_CORNERS = np.array([
+    (np.cos(angle), np.sin(angle)) for angle in np.radians(np.arange(6) * 60.0 + 30.0)
+])
+
+
+def cell_size(zoom: int, lat: float) -> float:
+    """Hexagon circumradius in metres for ``zoom`` at latitude ``lat``."""
+    return HEX_PIXELS * EARTH_METERS_PER_PIXEL * np.cos(np.radians(lat)) / 2 ** zoom
+
+
+def hex_cells(xy: np.ndarray, size: float) -> np.ndarray:
+    """Axial ``(q, r)`` of the hexagon containing each point (cube rounding)."""
+    q = (SQRT3 / 3.0 * xy[:, 0] - xy[:, 1] / 3.0) / size
+    r = (2.0 / 3.0 * xy[:, 1]) / size
+    s = -q - r
+    rq, rr, rs = np.round(q), np.round(r), np.round(s)
+    dq, dr, ds = np.abs(rq - q), np.abs(rr - r), np.abs(rs - s)
+    fix_q = (dq > dr) & (dq > ds)
+    fix_r = ~fix_q & (dr > ds)
+    rq = np.where(fix_q, -rr - rs, rq)
+    rr = np.where(fix_r, -rq - rs, rr)
+    return np.column_stack([rq, rr]).astype(np.int64)
+
+
+def sorted_unique(keys: np.ndarray, return_inverse: bool = False):
+    """``np.unique`` for 1-D int keys via a single sort.
+
+    NumPy's hash-based ``unique`` is an order of magnitude slower on the
+    millions of (feature, cell) keys the finest zoom levels produce.
+    """
+    order = np.argsort(keys) if return_inverse else None
+    ordered = keys[order] if return_inverse else np.sort(keys)
+    first = np.empty(len(ordered), dtype=bool)
+    first[:1] = True
+    np.not_equal(ordered[1:], ordered[:-1], out=first[1:])
+    if not return_inverse:
+        return ordered[first]
+    inverse = np.empty(len(keys), dtype=np.int64)
+    inverse[order] = np.cumsum(first) - 1
+    return ordered[first], inverse
+
+
+def hex_centers(cells: np.ndarray, size: float) -> np.ndarray:
+    q, r = cells[:, 0], cells[:, 1]
+    return np.column_stack([size * SQRT3 * (q + r / 2.0), size * 1.5 * r])
+
+
+def polygon_candidates(bounds, size: float, chunk: int = POLYGON_CHUNK_CELLS):
+    """Yield the axial cells whose centres may lie in ``bounds``, ``chunk`` at a time.
+
+    Rows follow the hexagon rows, so the candidates cover the bounding
+    rectangle rather than its much larger axial parallelogram. Each cell is
+    yielded once; a chunk holds whole rows (at least one).
+    """
+    xmin, ymin, xmax, ymax = bounds
+    rows = np.arange(np.floor(ymin / (1.5 * size)) - 1, np.ceil(ymax / (1.5 * size)) + 2, dtype=np.int64)
+    width = int(np.ceil((xmax - xmin) / (SQRT3 * size))) + 3
+    step = max(1, chunk // width)
+    for i in range(0, len(rows), step):
+        block = rows[i:i + step]
+        first_q = np.floor(xmin / (SQRT3 * size) - block / 2.0).astype(np.int64) - 1
+        r = np.repeat(block, width)
+        q = np.repeat(first_q, width) + np.tile(np.arange(width, dtype=np.int64), len(block))
+        yield np.column_stack([q, r])
+
+
+def sample_lines(parts, step: float):
+    """Points every ``step`` metres along ``[(owner, coords), ...]`` polylines."""
+    starts, ends, owners = [], [], []
+    for owner, coords in parts:
+        if len(coords) < 2:
+            continue
+        starts.append(coords[:-1])
+        ends.append(coords[1:])
+        owners.append(np.full(len(coords) - 1, owner))
+    if not starts:
+        return np.empty((0, 2)), np.empty(0, dtype=np.int64)
+    starts, ends, owners = np.concatenate(starts), np.concatenate(ends), np.concatenate(owners)
+    deltas = ends - starts
+    samples = np.ceil(np.hypot(deltas[:, 0], deltas[:, 1]) / step).astype(np.int64) + 1
+    segment = np.repeat(np.arange(len(starts)), samples)
+    offset = np.arange(samples.sum()) - np.repeat(np.cumsum(samples) - samples, samples)
+    t = offset / (samples[segment] - 1)
+    return starts[segment] + deltas[segment] * t[:, None], owners[segment]
+
+
+class Projection:
+    def __init__(self, lon0: float, lat0: float):
+        self.origin = np.array([lon0, lat0])
+        self.scale = np.array([METERS_PER_DEGREE * np.cos(np.radians(lat0)), METERS_PER_DEGREE])
+
+    def forward(self, coords: np.ndarray) -> np.ndarray:
+        return (coords - self.origin) * self.scale
+
+    def inverse(self, xy: np.ndarray) -> np.ndarray:
+        return xy / self.scale + self.origin
+
+
+def bin_features(features: dict, zooms=ZOOM_LEVELS) -> dict:
+    """``{zoom: FeatureCollection}`` of hexagons for ``{"points"|"lines"|"polygons": [Feature]}``."""
+    geometries = []
+    for kind in KINDS:
+        for feature in features.get(kind, []):
+            try:
+                geometry = shape(feature["geometry"])
+            except Exception:
+                continue
+            if not geometry.is_empty:
+                geometries.append((kind, geometry))
+    if not geometries:
+        # No origin to measure from; report the cell size at the equator
+        return {zoom: _empty_level(cell_size(zoom, 0.0)) for zoom in zooms}
+
+    # Origin rounded to 0.01 degrees keeps the grid stable as answers arrive
+    lon0, lat0 = np.round(np.mean(shapely.get_coordinates([g for _, g in geometries]), axis=0), 2)
+    projection = Projection(float(lon0), float(lat0))
+    projected = [(kind, shapely.transform(g, projection.forward)) for kind, g in geometries]
+    kind_of = np.array([KINDS.index(kind) for kind, _ in projected])
+
+    point_xy, point_owner, line_parts, polygons = [], [], [], []
+    for owner, (kind, geometry) in enumerate(projected):
+        if kind == "points":
+            coords = shapely.get_coordinates(geometry)
+            point_xy.append(coords)
+            point_owner.append(np.full(len(coords), owner))
+        elif kind == "lines":
+            line_parts += [(owner, shapely.get_coordinates(part)) for part in shapely.get_parts(geometry)]
+        else:
+            shapely.prepare(geometry)
+            outline = [(owner, shapely.get_coordinates(part)) for part in shapely.get_parts(geometry.boundary)]
+            polygons.append((geometry, outline))
+    point_xy = np.concatenate(point_xy) if point_xy else np.empty((0, 2))
+    point_owner = np.concatenate(point_owner) if point_owner else np.empty(0, dtype=np.int64)
+    bounds = shapely.total_bounds([g for _, g in projected])
+
+    return {
+        zoom: _bin_level(cell_size(zoom, lat0), projection, bounds, kind_of, point_xy, point_owner,
+                         line_parts, polygons)
+        for zoom in zooms
+    }
+
+
+def _fold(keys, counts, chunks):
+    """Merge per-polygon unique cell keys into running ``(keys, counts)``."""
+    merged, inverse = sorted_unique(np.concatenate([keys] + chunks), return_inverse=True)
+    weights = np.concatenate([counts] + [np.ones(len(chunk), dtype=np.int64) for chunk in chunks])
+    return merged, np.bincount(inverse, weights=weights, minlength=len(merged)).astype(np.int64)
+
+
+def _bin_level(size, projection, bounds, kind_of, point_xy, point_owner, line_parts, polygons) -> dict:
+    # Cells are packed into int64 keys over the axial range of ``bounds``
+    xmin, ymin, xmax, ymax = bounds
+    corners = hex_cells(np.array([[xmin, ymin], [xmax, ymax], [xmin, ymax], [xmax, ymin]]), size)
+    lo = corners.min(axis=0) - 2
+    span = corners.max(axis=0) + 2 - lo + 1
+    cells_total = int(span[0] * span[1])
+
+    def pack(cells):
+        return (cells[:, 0] - lo[0]) * span[1] + (cells[:, 1] - lo[1])
+
+    # Points and lines: one hit per (feature, cell)
+    line_xy, line_owner = sample_lines(line_parts, size / 2.0)
+    owner = np.concatenate([point_owner, line_owner])
+    cells = np.concatenate([hex_cells(point_xy, size), hex_cells(line_xy, size)])
+    hits = sorted_unique(owner * cells_total + pack(cells))
+    hit_owner, hit_cell = np.divmod(hits, cells_total)
+
+    # Polygons: interior cells (centre inside) come chunk by chunk and are
+    # distinct by construction; outline cells are kept only where their
+    # centre is outside, so each polygon still counts once per cell. Chunks
+    # are folded into per-cell counts, so memory follows distinct cells.
+    polygon_keys = np.empty(0, dtype=np.int64)
+    polygon_counts = np.empty(0, dtype=np.int64)
+    pending, pending_cells = [], 0
+
+    def add(keys):
+        nonlocal polygon_keys, polygon_counts, pending, pending_cells
+        pending.append(keys)
+        pending_cells += len(keys)
+        if pending_cells > POLYGON_FOLD_CELLS:
+            polygon_keys, polygon_counts = _fold(polygon_keys, polygon_counts, pending)
+            pending, pending_cells = [], 0
+
+    for polygon, outline in polygons:
+        outline_xy, _ = sample_lines(outline, size / 2.0)
+        cells = hex_cells(outline_xy, size)
+        centers = hex_centers(cells, size)
+        add(sorted_unique(pack(cells[~shapely.contains_xy(polygon, centers[:, 0], centers[:, 1])])))
+        for candidates in polygon_candidates(polygon.bounds, size):
+            centers = hex_centers(candidates, size)
+            add(pack(candidates[shapely.contains_xy(polygon, centers[:, 0], centers[:, 1])]))
+    if pending:
+        polygon_keys, polygon_counts = _fold(polygon_keys, polygon_counts, pending)
+
+    if not len(hit_cell) and not len(polygon_keys):
+        return _empty_level(size)
+
+    # Per-cell totals by geometry kind
+    keys = np.concatenate([hit_cell, polygon_keys])
+    kinds = np.concatenate([kind_of[hit_owner], np.full(len(polygon_keys), KINDS.index("polygons"))])
+    weights = np.concatenate([np.ones(len(hit_cell), dtype=np.int64), polygon_counts])
+    cell_keys, inverse = sorted_unique(keys, return_inverse=True)
+    unique_cells = np.column_stack([cell_keys // span[1] + lo[0], cell_keys % span[1] + lo[1]])
+    per_kind = [
+        np.bincount(inverse, weights=weights * (kinds == k), minlength=len(cell_keys)).astype(np.int64)
+        for k in range(len(KINDS))
+    ]
+    counts = np.sum(per_kind, axis=0)
+    max_count = int(counts.max())
+
+    centers = hex_centers(unique_cells, size)
+    rings = projection.inverse(centers[:, None, :] + HEX_CORNERS[None, :, :] * size)
+    rings = np.round(rings, 7).tolist()
+    features = []
+    for i, ring in enumerate(rings):
+        properties = {"count": int(counts[i]), "intensity": round(int(counts[i]) / max_count, 4)}
+        properties.update({kind: int(per_kind[k][i]) for k, kind in enumerate(KINDS)})
+        features.append({
+            "type": "Feature",
+            "geometry": {"type": "Polygon", "coordinates": [ring + ring[:1]]},
+            "properties": properties,
+        })
+    return {"type": "FeatureCollection", "features": features, "cellSize": round(size, 2), "maxCount": max_count}
+
+
+def _empty_level(size: float) -> dict:
+    return {"type": "FeatureCollection", "features": [], "cellSize": round(size, 2), "maxCount": 0}
+
+
+class DensityBins:
+    """Disk-cached ``bin_features`` for each project question."""
+
+    def __init__(self, config_root: str, results_summary):
+        self.config_root = config_root
+        self.results_summary = results_summary
+        self._lock = threading.Lock()
+
+    def _sticker_files(self, project_id: str):
+        answers_dir = os.path.join(self.config_root, project_id, 'answers')
+        if not os.path.isdir(answers_dir):
+            return []
+        return sorted(
+            (entry.name, entry.stat().st_size, entry.stat().st_mtime)
+            for entry in os.scandir(answers_dir)
+            if entry.is_file() and entry.name.endswith('.geojson')
+        )
+
+    def _sticker_features(self, project_id: str, stickers, question_id: str) -> list:
+        """Features of ``save_geojson`` files tagged with ``properties.questionId``."""
+        features = []
+        for name, _, _ in stickers:
+            try:
+                with open(os.path.join(self.config_root, project_id, 'answers', name), 'r') as f:
+                    data = json.load(f)
+            except Exception:
+                continue
+            for feature in data.get('features', []) if isinstance(data, dict) else []:
+                if isinstance(feature, dict) and (feature.get('properties') or {}).get('questionId') == question_id:
+                    features.append(feature)
+        return features
+
+    def get(self, project_id: str, question_id: str, zoom: int) -> bytes:
+        """Encoded FeatureCollection of cells at the nearest precomputed zoom."""
+        zoom = min(max(int(zoom), ZOOM_LEVELS[0]), ZOOM_LEVELS[-1])
+        if not os.path.isdir(os.path.join(self.config_root, project_id, 'answers')):
+            # Nothing to bin; never create .bins/ for an unknown project id
+            return json.dumps(_empty_level(cell_size(zoom, 0.0)), separators=(',', ':')).encode()
+        version, features = self.results_summary.question_features(project_id, question_id)
+        stickers = self._sticker_files(project_id)
+        key = hashlib.sha1(repr((version, stickers)).encode()).hexdigest()[:12]
+        safe_question = re.sub(r'[^\w-]', '_', question_id)
+        bins_dir = os.path.join(self.config_root, project_id, '.bins')
+        path = os.path.join(bins_dir, f"{safe_question}-{key}-z{zoom}.json")
+
+        with self._lock:
+            try:
+                with open(path, 'rb') as f:
+                    return f.read()
+            except FileNotFoundError:
+                pass
+            for feature in self._sticker_features(project_id, stickers, question_id):
+                kind = GEOMETRY_GROUPS.get((feature.get('geometry') or {}).get('type'))
+                if kind:
+                    features[kind].append(feature)
+            levels = {
+                level: json.dumps(collection, separators=(',', ':')).encode()
+                for level, collection in bin_features(features).items()
+            }
+            self._write_levels(bins_dir, safe_question, key, levels)
+            return levels[zoom]
+
+    def _write_levels(self, bins_dir: str, safe_question: str, key: str, levels: dict):
+        os.makedirs(bins_dir, exist_ok=True)
+        for zoom, body in levels.items():
+            write_atomic(os.path.join(bins_dir, f"{safe_question}-{key}-z{zoom}.json"), body, sync_dir=False)
+        # Other server processes may be writing another key for this question
+        # right now, so only files that have been stale for a while are pruned
+        prefix = f"{safe_question}-"
+        cutoff = time.time() - STALE_BINS_SECONDS
+        for entry in os.scandir(bins_dir):
+            name = entry.name
+            if name.startswith(prefix) and not name.startswith(f"{prefix}{key}-") \
+                    and re.fullmatch(r'[0-9a-f]{12}-z\d+\.json', name[len(prefix):]):
+                try:
+                    if entry.stat().st_mtime < cutoff:
+                        os.remove(entry.path)
+                except FileNotFoundError:
+                    pass  # pruned by another process
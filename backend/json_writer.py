@@ -0,0 +1,136 @@
+"""Atomic JSON writes through a bounded background writer.
+
+Payloads are serialized compactly by the calling request (with orjson when
+it is installed), then a single writer thread puts each one in a temp file
+next to its target, fsyncs it, ``os.replace``s it into place and fsyncs
+the directory. Readers never see a truncated file, and saves to the same
+path land in submission order. Jobs that queue up together while a room
+submits at once are written as one batch, sharing a directory fsync.
+
+The queue is bounded: when it stays full for ``timeout`` seconds ``submit``
+raises ``WriterBusy`` so the request can answer 503 instead of piling up.
+``write`` returns only once the file is durable.
+"""
+import json
+import os
+import queue
+import tempfile
+import threading
+from concurrent.futures import Future
+
+try:
+    import orjson
+except ImportError:  # optional, the stdlib encoder is used instead
+    orjson = None
+
+
+class WriterBusy(Exception):
+    """The write queue stayed full; the caller should retry later."""
+
+
+def dumps(obj) -> bytes:
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj)
+        except TypeError:
+            pass  # e.g. integers beyond 64 bits, which json handles
+    return json.dumps(obj, separators=(',', ':')).encode()
+
+
+def _fsync_dir(path: str):
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return  # not supported on Windows
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def write_atomic(path: str, data: bytes, sync_dir: bool = True):
+    """Replace ``path`` with ``data`` via fsync'ed temp file and rename."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        os.chmod(tmp_path, 0o644)  # mkstemp creates 0600; match files written with open()
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    if sync_dir:
+        _fsync_dir(directory)
+
+
+class JsonWriter:
+    def __init__(self, max_pending: int = 64, batch: int = 32):
+        self.batch = batch
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._lock = threading.Lock()
+        self._thread = None
+        self.written = 0
+        self.rejected = 0
+
+    def _ensure_started(self):
+        # Started on first use, so a forking server starts it in each worker
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="json-writer", daemon=True)
+                self._thread.start()
+
+    def submit(self, path: str, obj, timeout: float = 5.0) -> Future:
+        """Queue ``obj`` for ``path``; the future resolves once it is on disk."""
+        data = dumps(obj)
+        future = Future()
+        self._ensure_started()
+        try:
+            self._queue.put((path, data, future), timeout=timeout)
+        except queue.Full:
+            with self._lock:
+                self.rejected += 1
+            raise WriterBusy(f"{self._queue.maxsize} writes already pending")
+        return future
+
+    def write(self, path: str, obj, timeout: float = 5.0, durable_timeout: float = 30.0):
+        """Blocking ``submit``: return after the file is durable, re-raising write errors."""
+        self.submit(path, obj, timeout).result(durable_timeout)
+
+    def stats(self) -> dict:
+        return {"pending": self._queue.qsize(), "written": self.written, "rejected": self.rejected}
+
+    def _run(self):
+        while True:
+            jobs = [self._queue.get()]
+            while len(jobs) < self.batch:
+                try:
+                    jobs.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            # Renames only become durable with the directory fsync, so each
+            # future resolves after the one for its directory
+            by_directory = {}
+            for path, data, future in jobs:
+                try:
+                    write_atomic(path, data, sync_dir=False)
+                    by_directory.setdefault(os.path.dirname(os.path.abspath(path)), []).append(future)
+                except Exception as e:
+                    future.set_exception(e)
+            for directory, futures in by_directory.items():
+                try:
+                    _fsync_dir(directory)
+                except OSError as e:
+                    for future in futures:
+                        future.set_exception(e)
+                    continue
+                with self._lock:
+                    self.written += len(futures)
+                for future in futures:
+                    future.set_result(None)
@@ -0,0 +1,74 @@
+"""Camera layout and observation fusion for multi-camera detection.
+
+Each source runs capture, detection and mapping in its own process with its
+own homography into the shared normalized map space; the main process only
+merges the per-camera tag positions. A tag seen by several cameras gets the
+decision-margin-weighted mean of their positions, so the camera with the
+clearer view dominates and a hand occluding one view does not drop the tag.
+"""
+import json
+
+from calibration import BOUNDARY_IDS, MAP_CORNERS
+
+
+def load_camera_configs(sources, layout_path: str = None) -> list:
+    """One ``{"source", "boundary_ids", "map_points"}`` dict per camera.
+
+    Without a layout file every source uses boundary tags 1-4 on the unit
+    square. A layout file is a JSON list of such dicts, for tables where a
+    camera only sees part of the surface and needs its own reference tags.
+    """
+    if layout_path:
+        with open(layout_path, "r", encoding="utf-8") as f:
+            configs = json.load(f)
+    else:
+        configs = [{"source": source} for source in sources]
+
+    for config in configs:
+        config.setdefault("boundary_ids", list(BOUNDARY_IDS))
+        config.setdefault("map_points", MAP_CORNERS.tolist())
+        if len(config["boundary_ids"]) != 4 or len(config["map_points"]) != 4:
+            raise ValueError(f"Camera {config['source']}: need four boundary_ids and four map_points")
+    return configs
+
+
+class ObservationFusion:
+    """Keeps each camera's latest mapped tags and merges the fresh ones.
+
+    Observations older than ``max_age`` seconds (relative to the newest one)
+    are ignored, so a camera that stalls does not pin tags in place.
+    Reference tags of any camera (``ignore_ids``) are never reported as
+    movable, even when another camera maps them.
+    """
+
+    def __init__(self, sources: int, max_age: float = 0.25, ignore_ids=()):
+        self.max_age = max_age
+        self.ignore_ids = {str(tag_id) for tag_id in ignore_ids}
+        self._latest = [None] * sources
+
+    def update(self, source_index: int, timestamp: float, tags: dict, detected_ids: list):
+        """Record one camera frame; return fused ``(tags, detected_ids, timestamp)``."""
+        self._latest[source_index] = (timestamp, tags, detected_ids)
+        newest = max(entry[0] for entry in self._latest if entry is not None)
+        fresh = [entry for entry in self._latest if entry is not None and newest - entry[0] <= self.max_age]
+
+        sums = {}
+        ids = set()
+        for _, cam_tags, cam_ids in fresh:
+            ids.update(cam_ids)
+            for key, tag in cam_tags.items():
+                if key in self.ignore_ids:
+                    continue
+                weight = max(tag["margin"], 1e-3)
+                acc = sums.setdefault(key, [0.0, 0.0, 0.0, 0.0, 0, tag["id"]])
+                acc[0] += weight * tag["x"]
+                acc[1] += weight * tag["y"]
+                acc[2] += weight
+                acc[3] = max(acc[3], tag["margin"])
+                acc[4] += 1
+
+        fused = {
+            key: {"x": x / weight, "y": y / weight, "id": tag_id, "margin": margin, "cameras": cameras}
+            for key, (x, y, weight, margin, cameras, tag_id) in sums.items()
+        }
+        return fused, sorted(ids), newest
@@ -0,0 +1,166 @@
+"""Detection pipeline instrumentation: stage timings, tag counts, margins.
+
+``PipelineMetrics`` is updated from the capture/detect/publish threads and
+rendered in the Prometheus text exposition format for ``/api/metrics``;
+``MetricsLog`` optionally appends a JSON summary line to a rotating file
+every few seconds so lag complaints can be checked after a live session.
+"""
+import json
+import logging
+import threading
+import time
+from bisect import bisect_left
+from logging.handlers import RotatingFileHandler
+
+STAGES = ("capture", "grayscale", "detect", "homography", "publish", "queue_age")
+SECONDS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.02, 0.033, 0.05, 0.1, 0.25, 0.5, 1.0)
+MARGIN_BUCKETS = (10, 20, 30, 40, 60, 80, 100, 150, 200)
+
+
+class Histogram:
+    """Cumulative Prometheus-style histogram; callers hold the metrics lock."""
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def lines(self, name: str, labels: str = "") -> list:
+        prefix = labels + "," if labels else ""
+        out = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + ("+Inf",), self.counts):
+            cumulative += count
+            out.append(f'{name}_bucket{{{prefix}le="{bound}"}} {cumulative}')
+        suffix = f"{{{labels}}}" if labels else ""
+        out.append(f"{name}_sum{suffix} {self.total:.6f}")
+        out.append(f"{name}_count{suffix} {self.count}")
+        return out
+
+
+class PipelineMetrics:
+    """Thread-safe collection of everything the detector reports."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stages = {stage: Histogram(SECONDS_BUCKETS) for stage in STAGES}
+        self.margins = Histogram(MARGIN_BUCKETS)
+        self.tags_detected = 0
+        self.tags_filtered = 0
+        self.tags_visible = 0
+        self.frames = 0
+        self.started = time.time()
+        self._sources = []
+
+    def add_source(self, prefix: str, stats):
+        """Export ``stats()`` (a dict of monotonic counts) as ``<prefix>_<key>_total``."""
+        self._sources.append((prefix, stats))
+
+    def observe(self, stage: str, seconds: float):
+        with self._lock:
+            self.stages[stage].observe(seconds)
+
+    def observe_detections(self, detections, filtered: int, visible: int):
+        with self._lock:
+            self.frames += 1
+            self.tags_detected += len(detections)
+            self.tags_filtered += filtered
+            self.tags_visible = visible
+            for det in detections:
+                self.margins.observe(float(det.decision_margin))
+
+    def render(self) -> str:
+        lines = [
+            "# HELP apriltag_stage_seconds Time spent per pipeline stage (queue_age: capture to publish)",
+            "# TYPE apriltag_stage_seconds histogram",
+        ]
+        with self._lock:
+            for stage, histogram in self.stages.items():
+                lines += histogram.lines("apriltag_stage_seconds", f'stage="{stage}"')
+            lines += [
+                "# HELP apriltag_decision_margin Decision margin of detected tags",
+                "# TYPE apriltag_decision_margin histogram",
+            ]
+            lines += self.margins.lines("apriltag_decision_margin")
+            lines += [
+                "# HELP apriltag_frames_processed_total Frames that reached the publish stage",
+                "# TYPE apriltag_frames_processed_total counter",
+                f"apriltag_frames_processed_total {self.frames}",
+                "# HELP apriltag_tags_detected_total Tag detections, boundary tags included",
+                "# TYPE apriltag_tags_detected_total counter",
+                f"apriltag_tags_detected_total {self.tags_detected}",
+                "# HELP apriltag_tags_filtered_total Detections dropped by the --min-margin filter",
+                "# TYPE apriltag_tags_filtered_total counter",
+                f"apriltag_tags_filtered_total {self.tags_filtered}",
+                "# HELP apriltag_tags_visible Movable tags in the latest published snapshot",
+                "# TYPE apriltag_tags_visible gauge",
+                f"apriltag_tags_visible {self.tags_visible}",
+            ]
+        for prefix, stats in self._sources:
+            for key, value in stats().items():
+                name = f"{prefix}_{key}_total"
+                lines += [f"# TYPE {name} counter", f"{name} {value}"]
+        lines += [
+            "# TYPE apriltag_uptime_seconds gauge",
+            f"apriltag_uptime_seconds {time.time() - self.started:.1f}",
+        ]
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> dict:
+        """Compact cumulative view for the rolling log."""
+        with self._lock:
+            summary = {
+                "time": time.time(),
+                "frames": self.frames,
+                "tags_detected": self.tags_detected,
+                "tags_filtered": self.tags_filtered,
+                "tags_visible": self.tags_visible,
+                "mean_margin": self.margins.total / self.margins.count if self.margins.count else None,
+                "stage_ms": {
+                    stage: round(1000.0 * h.total / h.count, 3) if h.count else None
+                    for stage, h in self.stages.items()
+                },
+            }
+        for prefix, stats in self._sources:
+            summary[prefix] = stats()
+        return summary
+
+
+class MetricsLog:
+    """Background thread appending ``metrics.summary()`` as JSON lines.
+
+    The file rotates at ``max_bytes`` keeping ``backups`` old files.
+    """
+
+    def __init__(self, metrics: PipelineMetrics, path: str, interval: float = 5.0,
+                 max_bytes: int = 1_000_000, backups: int = 3):
+        self.metrics = metrics
+        self.interval = interval
+        self._logger = logging.getLogger(f"apriltag.metrics.{path}")
+        self._logger.setLevel(logging.INFO)
+        self._logger.propagate = False
+        self._logger.addHandler(RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups))
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="metrics-log", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join(timeout=1.0)
+        self._write()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._write()
+
+    def _write(self):
+        self._logger.info(json.dumps(self.metrics.summary()))
@@ -0,0 +1,134 @@
+"""Change-driven publication of tag positions for the detector's Flask API."""
+import json
+import struct
+import threading
+import uuid
+
+try:
+    import msgpack
+except ImportError:  # optional, only needed for ?format=msgpack
+    msgpack = None
+
+# Binary layout, little-endian:
+#   header  seq:uint32  timestamp:float64  n_tags:uint16  n_ids:uint16
+#   n_tags  id:uint16   x:float32  y:float32  margin:float32
+#   n_ids   id:uint16
+BINARY_HEADER = struct.Struct("<IdHH")
+BINARY_TAG = struct.Struct("<Hfff")
+MIMETYPES = {
+    "json": "application/json",
+    "binary": "application/octet-stream",
+    "msgpack": "application/msgpack",
+}
+
+
+class EncodedSnapshot:
+    """One immutable snapshot plus its wire encodings, built at most once each."""
+
+    def __init__(self, snapshot: dict):
+        self.snapshot = snapshot
+        self.seq = snapshot["seq"]
+        self.boot = snapshot["boot"]
+        self.etag = f'"{self.boot}-{self.seq}"'
+        self._encoded = {"json": json.dumps(snapshot, separators=(",", ":")).encode()}
+
+    def encode(self, fmt: str = "json") -> bytes:
+        body = self._encoded.get(fmt)
+        if body is None:
+            if fmt == "binary":
+                body = self._binary()
+            elif fmt == "msgpack":
+                if msgpack is None:
+                    raise ValueError("msgpack is not installed")
+                body = msgpack.packb(self.snapshot)
+            else:
+                raise ValueError(f"Unknown format: {fmt}")
+            self._encoded[fmt] = body
+        return body
+
+    def _binary(self) -> bytes:
+        tags = list(self.snapshot["tags"].values())
+        ids = self.snapshot["detected_ids"]
+        parts = [BINARY_HEADER.pack(self.seq, self.snapshot["timestamp"], len(tags), len(ids))]
+        parts += [BINARY_TAG.pack(tag["id"], tag["x"], tag["y"], tag["margin"]) for tag in tags]
+        parts.append(struct.pack(f"<{len(ids)}H", *ids))
+        return b"".join(parts)
+
+
+class PositionPublisher:
+    """Holds the latest tag snapshot and wakes stream clients when it changes.
+
+    Every detection frame calls ``update``; a new message is published only
+    if the set of tags changed or a tag moved more than ``threshold`` (in
+    normalized map units). Messages carry the frame sequence number and the
+    capture timestamp of the frame they came from, plus a ``boot`` id
+    unique to this process: sequence numbers restart at 0 with the
+    detector, so clients compare both.
+
+    Snapshots are serialized once, on the detection side and outside the
+    lock, and swapped in as a whole; requests only take a reference.
+    """
+
+    def __init__(self, threshold: float = 0.002):
+        self.threshold = threshold
+        self._condition = threading.Condition()
+        self._frame_seq = 0
+        self.boot = uuid.uuid4().hex[:12]
+        self._current = EncodedSnapshot({
+            "seq": 0, "boot": self.boot, "timestamp": 0.0, "tags": {}, "detected_ids": [],
+        })
+
+    def update(self, tags: dict, detected_ids: list, timestamp: float):
+        with self._condition:
+            self._frame_seq += 1
+            seq = self._frame_seq
+            if not self._changed(tags, detected_ids):
+                return False
+        current = EncodedSnapshot({
+            "seq": seq,
+            "boot": self.boot,
+            "timestamp": timestamp,
+            "tags": tags,
+            "detected_ids": detected_ids,
+        })
+        with self._condition:
+            self._current = current
+            self._condition.notify_all()
+        return True
+
+    def _changed(self, tags: dict, detected_ids: list) -> bool:
+        previous = self._current.snapshot
+        if set(detected_ids) != set(previous["detected_ids"]):
+            return True
+        if tags.keys() != previous["tags"].keys():
+            return True
+        for tag_id, tag in tags.items():
+            old = previous["tags"][tag_id]
+            if abs(tag["x"] - old["x"]) > self.threshold or abs(tag["y"] - old["y"]) > self.threshold:
+                return True
+        return False
+
+    def current(self) -> EncodedSnapshot:
+        return self._current
+
+    def snapshot(self) -> dict:
+        return self._current.snapshot
+
+    def wait(self, last_seq: int, timeout: float):
+        """Block until a snapshot newer than ``last_seq`` exists; None on timeout."""
+        with self._condition:
+            self._condition.wait_for(lambda: self._current.seq > last_seq, timeout)
+            if self._current.seq > last_seq:
+                return self._current
+            return None
+
+    def sse_events(self, keepalive: float = 15.0):
+        """Server-sent-events generator: current snapshot, then every change."""
+        last_seq = -1
+        while True:
+            current = self.wait(last_seq, keepalive)
+            if current is None:
+                yield ": keepalive\n\n"
+                continue
+            last_seq = current.seq
+            yield f"id: {last_seq}\ndata: {current.encode().decode()}\n\n"
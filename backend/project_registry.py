@@ -0,0 +1,173 @@
+"""In-memory registry of project configs (``projects/<id>/config.json``).
+
+Parsed configs, their list metadata and encoded JSON are kept per project
+and reused while the file's ``(mtime_ns, size)`` is unchanged. Writes made
+by the app go through ``put``/``remove`` and take effect immediately, and
+they keep the latest-updated pointer current without a rescan. Outside edits
+are noticed because any project dir being added or removed changes the
+root's mtime, and because all configs are re-stat'ed (never re-parsed
+unless changed) at most every ``revalidate`` seconds. Looking up one
+project always stats its file. A request therefore costs O(1) stats
+regardless of how many projects exist.
+
+Entries are keyed by project directory name; ids that are not a plain
+directory name (``../x``, ``a/b``, ``..``) are never looked up or stored.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+
+
+def is_project_id(value) -> bool:
+    """True if ``value`` names a direct child of the projects directory."""
+    return (
+        isinstance(value, str) and value not in ('', '.', '..')
+        and os.path.basename(value) == value
+        and not (os.path.altsep and os.path.altsep in value)
+    )
+
+
+class ProjectEntry:
+    __slots__ = ('dirname', 'path', 'stamp', 'mtime', 'config', 'error', 'meta', 'body', 'etag')
+
+    def __init__(self, dirname: str, path: str, stat, config=None, error=None):
+        self.dirname = dirname
+        self.path = path
+        self.stamp = (stat.st_mtime_ns, stat.st_size)
+        self.mtime = stat.st_mtime
+        self.config = config
+        self.error = error
+        self.etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+        self.body = json.dumps(config, separators=(',', ':')).encode() if error is None else None
+        project = config.get('project', {}) if isinstance(config, dict) else {}
+        self.meta = {
+            "id": project.get('id') or dirname,
+            "name": project.get('name'),
+            "location": project.get('location'),
+            "mapId": project.get('mapId'),
+            "updatedAt": stat.st_mtime,
+        } if error is None else None
+
+    @property
+    def project_id(self):
+        """``project.id`` from the config itself (may differ from the dir name)."""
+        project = self.config.get('project', {}) if isinstance(self.config, dict) else {}
+        return project.get('id')
+
+
+class ProjectRegistry:
+    def __init__(self, config_root: str, revalidate: float = 2.0):
+        self.config_root = config_root
+        self.revalidate = revalidate
+        self._lock = threading.RLock()
+        self._entries = {}
+        self._latest = None
+        self._root_mtime = None
+        self._checked = None
+        self._listing = None
+
+    def _config_path(self, dirname: str) -> str:
+        return os.path.join(self.config_root, dirname, 'config.json')
+
+    def _load(self, dirname: str, stat, config=None):
+        """Entry for ``dirname``, reusing the cached one if the file is unchanged."""
+        entry = self._entries.get(dirname)
+        if entry is not None and entry.stamp == (stat.st_mtime_ns, stat.st_size) and config is None:
+            return entry
+        path = self._config_path(dirname)
+        error = None
+        if config is None:
+            try:
+                with open(path, 'r') as f:
+                    config = json.load(f)
+            except Exception as e:
+                error = str(e)
+        return ProjectEntry(dirname, path, stat, config, error)
+
+    def _stat(self, dirname: str):
+        try:
+            return os.stat(self._config_path(dirname))
+        except (FileNotFoundError, NotADirectoryError):
+            return None
+
+    def _set(self, dirname: str, entry):
+        previous = self._entries.get(dirname)
+        if entry is previous:
+            return
+        if entry is None:
+            self._entries.pop(dirname, None)
+        else:
+            self._entries[dirname] = entry
+        self._listing = None
+        if entry is not None and (self._latest is None or entry.mtime >= self._latest.mtime):
+            self._latest = entry
+        elif self._latest is previous:
+            self._latest = max(self._entries.values(), key=lambda e: e.mtime, default=None)
+
+    def _refresh(self):
+        """Rescan when the set of project dirs changed or the revalidation window passed."""
+        try:
+            root_mtime = os.stat(self.config_root).st_mtime_ns
+        except FileNotFoundError:
+            root_mtime = None
+        now = time.monotonic()
+        if root_mtime == self._root_mtime and self._checked is not None and now - self._checked < self.revalidate:
+            return
+        seen = set()
+        if root_mtime is not None:
+            for entry in os.scandir(self.config_root):
+                if not entry.is_dir():
+                    continue
+                stat = self._stat(entry.name)
+                if stat is None:
+                    continue
+                seen.add(entry.name)
+                self._set(entry.name, self._load(entry.name, stat))
+        for dirname in list(self._entries.keys() - seen):
+            self._set(dirname, None)
+        self._root_mtime = root_mtime
+        self._checked = now
+
+    def get(self, project_id: str):
+        """Entry for one project dir, or None if it has no config or is not a valid id."""
+        if not is_project_id(project_id):
+            return None
+        with self._lock:
+            stat = self._stat(project_id)
+            self._set(project_id, self._load(project_id, stat) if stat is not None else None)
+            return self._entries.get(project_id)
+
+    def latest(self):
+        """Entry whose config.json was modified most recently."""
+        with self._lock:
+            self._refresh()
+            return self._latest
+
+    def latest_project_id(self):
+        entry = self.latest()
+        return entry.project_id if entry is not None else None
+
+    def listing(self):
+        """``(etag, encoded list of project metadata)`` for ``/api/projects``."""
+        with self._lock:
+            self._refresh()
+            if self._listing is None:
+                projects = [entry.meta for _, entry in sorted(self._entries.items()) if entry.meta]
+                body = json.dumps(projects, separators=(',', ':')).encode()
+                self._listing = (f'"{hashlib.sha1(body).hexdigest()[:16]}"', body)
+            return self._listing
+
+    def put(self, project_id: str, config: dict):
+        """Record a config the app has just written to disk."""
+        if not is_project_id(project_id):
+            raise ValueError(f"Invalid project id: {project_id!r}")
+        with self._lock:
+            self._set(project_id, self._load(project_id, os.stat(self._config_path(project_id)), config))
+
+    def remove(self, project_id: str):
+        if not is_project_id(project_id):
+            return
+        with self._lock:
+            self._set(project_id, None)
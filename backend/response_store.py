@@ -0,0 +1,216 @@
+"""SQLite index of saved survey responses, one database per project.
+
+The answer files in ``projects/<id>/answers/*.json`` stay the source of
+truth; the index (``projects/<id>/.responses.sqlite``) keeps a summary row
+(filename, savedAt, participant, size) plus the compact JSON body of every
+valid response, so listing is a single ordered query with LIMIT/OFFSET
+instead of parsing every file per request.
+
+Writes through ``add``/``remove`` keep the index current. Files added or
+deleted behind the server's back are picked up because a change of the
+answers directory's mtime triggers a reconcile, which only parses files
+whose size or mtime differs from the indexed row. Every change bumps a
+per-project revision number that caches built on top of the index (the
+results summary) use to tell whether they are stale. Revisions restart when
+a project is deleted and created again, so each index also gets a random
+generation id; ``(generation, revision)`` is the project's version.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+INDEX_NAME = ".responses.sqlite"
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    filename TEXT PRIMARY KEY,
+    saved_at TEXT NOT NULL,
+    participant TEXT,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    valid INTEGER NOT NULL,
+    body TEXT
+);
+CREATE INDEX IF NOT EXISTS responses_saved_at ON responses (valid, saved_at);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+
+def _saved_at(data: dict, mtime: float) -> str:
+    return data.get('savedAt') or time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(mtime))
+
+
+def _participant(data: dict):
+    value = data.get('participant') or data.get('participantId')
+    return str(value) if value is not None else None
+
+
+class ResponseStore:
+    """Per-project response index under ``config_root/<project>/answers``."""
+
+    def __init__(self, config_root: str):
+        self.config_root = config_root
+        self._lock = threading.Lock()
+
+    def answers_dir(self, project_id: str) -> str:
+        return os.path.join(self.config_root, project_id, 'answers')
+
+    def _connect(self, project_id: str):
+        # Next to answers/, not inside it: SQLite's journal files would
+        # otherwise touch the directory mtime used to detect outside changes
+        conn = sqlite3.connect(os.path.join(self.config_root, project_id, INDEX_NAME))
+        conn.executescript(SCHEMA)
+        with conn:
+            conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('generation', ?)", (uuid.uuid4().hex[:12],))
+        return conn
+
+    def _version(self, conn):
+        meta = dict(conn.execute("SELECT key, value FROM meta WHERE key IN ('generation', 'revision')"))
+        return meta['generation'], int(meta.get('revision', 0))
+
+    def _row(self, filename: str, data, size: int, mtime: float):
+        if not isinstance(data, dict) or 'answers' not in data:
+            return (filename, '', None, size, mtime, 0, None)
+        record = dict(data, savedAt=_saved_at(data, mtime), __filename=filename)
+        body = json.dumps(record, separators=(',', ':'))
+        return (filename, record['savedAt'], _participant(data), size, mtime, 1, body)
+
+    def _upsert(self, conn, row):
+        conn.execute(
+            "INSERT OR REPLACE INTO responses (filename, saved_at, participant, size, mtime, valid, body) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)", row
+        )
+
+    def _bump(self, conn) -> int:
+        row = conn.execute("SELECT value FROM meta WHERE key = 'revision'").fetchone()
+        revision = (int(row[0]) if row else 0) + 1
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('revision', ?)", (str(revision),))
+        return revision
+
+    def _set_dir_mtime(self, conn, project_id: str):
+        mtime = os.stat(self.answers_dir(project_id)).st_mtime
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('dir_mtime', ?)", (repr(mtime),))
+
+    def add(self, project_id: str, filename: str, data):
+        """Index a response file that was just written; return the new version."""
+        path = os.path.join(self.answers_dir(project_id), filename)
+        stat = os.stat(path)
+        with self._lock:
+            conn = self._connect(project_id)
+            try:
+                with conn:
+                    # Index the file first so the reconcile does not count it
+                    # as an outside change; anything else it finds bumps too
+                    self._upsert(conn, self._row(filename, data, stat.st_size, stat.st_mtime))
+                    self._sync(conn, project_id)
+                    self._set_dir_mtime(conn, project_id)
+                    self._bump(conn)
+                    return self._version(conn)
+            finally:
+                conn.close()
+
+    def remove(self, project_id: str, filename: str):
+        with self._lock:
+            conn = self._connect(project_id)
+            try:
+                with conn:
+                    conn.execute("DELETE FROM responses WHERE filename = ?", (filename,))
+                    self._sync(conn, project_id)
+                    self._set_dir_mtime(conn, project_id)
+                    self._bump(conn)
+                    return self._version(conn)
+            finally:
+                conn.close()
+
+    def version(self, project_id: str):
+        """``(generation, revision)`` of the project's index (``(None, 0)`` if it has no answers)."""
+        if not os.path.isdir(self.answers_dir(project_id)):
+            return None, 0
+        with self._lock:
+            conn = self._connect(project_id)
+            try:
+                with conn:
+                    self._sync(conn, project_id)
+                return self._version(conn)
+            finally:
+                conn.close()
+
+    def _sync(self, conn, project_id: str):
+        """Reconcile with the directory if it changed since the last indexed write."""
+        answers_dir = self.answers_dir(project_id)
+        dir_mtime = os.stat(answers_dir).st_mtime
+        stored = conn.execute("SELECT value FROM meta WHERE key = 'dir_mtime'").fetchone()
+        if stored is not None and float(stored[0]) == dir_mtime:
+            return
+
+        indexed = {name: (size, mtime) for name, size, mtime in conn.execute(
+            "SELECT filename, size, mtime FROM responses")}
+        seen = set()
+        changed = False
+        for entry in os.scandir(answers_dir):
+            if not entry.is_file() or not entry.name.endswith('.json'):
+                continue
+            seen.add(entry.name)
+            stat = entry.stat()
+            if indexed.get(entry.name) == (stat.st_size, stat.st_mtime):
+                continue
+            try:
+                with open(entry.path, 'r') as f:
+                    data = json.load(f)
+            except Exception:
+                data = None
+            self._upsert(conn, self._row(entry.name, data, stat.st_size, stat.st_mtime))
+            changed = True
+        removed = [(name,) for name in indexed.keys() - seen]
+        conn.executemany("DELETE FROM responses WHERE filename = ?", removed)
+        if changed or removed:
+            self._bump(conn)
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('dir_mtime', ?)", (repr(dir_mtime),))
+
+    def query(self, project_id: str, limit: int = None, offset: int = 0, since: str = None,
+              summary: bool = False, filenames=None):
+        """Return ``(items, total)``, newest first.
+
+        ``items`` are JSON strings of full responses (with ``__filename``),
+        or summary dicts when ``summary`` is set. ``since`` keeps responses
+        saved strictly after that ISO timestamp; ``filenames`` restricts the
+        result to those files.
+        """
+        if not os.path.isdir(self.answers_dir(project_id)):
+            return [], 0
+        where = "WHERE valid = 1"
+        params = []
+        if since:
+            where += " AND saved_at > ?"
+            params.append(since)
+        if filenames is not None:
+            filenames = list(filenames)
+            where += f" AND filename IN ({','.join('?' * len(filenames))})"
+            params.extend(filenames)
+        columns = "filename, saved_at, participant, size" if summary else "body"
+        # LIMIT -1 is SQLite for "no limit", so an offset alone still applies
+        page_params = [limit if limit is not None else -1, offset or 0]
+
+        with self._lock:
+            conn = self._connect(project_id)
+            try:
+                with conn:
+                    self._sync(conn, project_id)
+                total = conn.execute(f"SELECT COUNT(*) FROM responses {where}", params).fetchone()[0]
+                rows = conn.execute(
+                    f"SELECT {columns} FROM responses {where} ORDER BY saved_at DESC, filename DESC "
+                    "LIMIT ? OFFSET ?", params + page_params
+                ).fetchall()
+            finally:
+                conn.close()
+
+        if summary:
+            items = [
+                {"filename": name, "savedAt": saved_at, "participant": participant, "size": size}
+                for name, saved_at, participant, size in rows
+            ]
+        else:
+            items = [row[0] for row in rows]
+        return items, total
@@ -0,0 +1,199 @@
+"""Server-side aggregation of survey answers for the results page.
+
+For every question the summary holds the number of answers, an option
+histogram (choice questions), the text answers and the drawn/placed
+features merged into point, line and polygon FeatureCollections. A
+project's aggregate is built once from the ``ResponseStore`` bodies and then
+updated in place by ``save_responses``; it is rebuilt only when the store's
+revision moved for another reason (a deleted, overwritten or externally
+added file). Encoded JSON is cached per aggregate and per question, so the
+summary and one question's geometry are served without re-serializing.
+"""
+import json
+import threading
+
+CHOICE_TYPES = ('single-choice', 'multi-choice')
+GEOMETRY_GROUPS = {
+    'Point': 'points', 'MultiPoint': 'points',
+    'LineString': 'lines', 'MultiLineString': 'lines',
+    'Polygon': 'polygons', 'MultiPolygon': 'polygons',
+}
+GROUPS = ('points', 'lines', 'polygons')
+
+
+def _dumps(value) -> bytes:
+    return json.dumps(value, separators=(',', ':')).encode()
+
+
+class QuestionAggregate:
+    def __init__(self, question_id: str):
+        self.question_id = question_id
+        self.question_text = None
+        self.type = None
+        self.count = 0
+        self.options = {}
+        self.texts = []
+        self.features = {group: [] for group in GROUPS}
+
+    def add(self, answer: dict):
+        self.count += 1
+        self.type = self.type or answer.get('type')
+        self.question_text = self.question_text or answer.get('questionText')
+        value = answer.get('answer')
+
+        features = value.get('features') if isinstance(value, dict) else None
+        if isinstance(features, list):
+            for feature in features:
+                geom_type = (feature.get('geometry') or {}).get('type') if isinstance(feature, dict) else None
+                group = GEOMETRY_GROUPS.get(geom_type)
+                if group:
+                    self.features[group].append(feature)
+        elif answer.get('type') == 'text':
+            if value is not None and str(value).strip():
+                self.texts.append(str(value))
+        elif isinstance(value, list):
+            for option in value:
+                if option:
+                    self._count_option(option)
+        elif value is not None:
+            self._count_option(value)
+
+    def _count_option(self, option):
+        key = str(option)
+        self.options[key] = self.options.get(key, 0) + 1
+
+    def summary(self) -> dict:
+        return {
+            'questionId': self.question_id,
+            'questionText': self.question_text,
+            'type': self.type,
+            'count': self.count,
+            # Most chosen first, ties in first-seen order
+            'options': sorted(self.options.items(), key=lambda item: -item[1]),
+            'texts': self.texts,
+            'features': {group: len(items) for group, items in self.features.items()},
+        }
+
+    def feature_collections(self) -> dict:
+        return {
+            group: {'type': 'FeatureCollection', 'features': items}
+            for group, items in self.features.items()
+        }
+
+
+class ProjectAggregate:
+    """Aggregates over one set of responses."""
+
+    def __init__(self, project_id: str, generation: str = None, revision: int = None):
+        self.project_id = project_id
+        self.generation = generation
+        self.revision = revision
+        self.filenames = set()
+        self.questions = {}
+        self._summary_json = None
+        self._features_json = {}
+
+    def add(self, filename: str, response: dict):
+        self.filenames.add(filename)
+        self._summary_json = None
+        for answer in response.get('answers') or []:
+            if not isinstance(answer, dict) or not answer.get('questionId'):
+                continue
+            question_id = answer['questionId']
+            question = self.questions.get(question_id)
+            if question is None:
+                question = self.questions[question_id] = QuestionAggregate(question_id)
+            question.add(answer)
+            self._features_json.pop(question_id, None)
+
+    @property
+    def version(self) -> str:
+        """Store generation and revision, e.g. for an ETag."""
+        return f"{self.generation}-{self.revision}"
+
+    def summary_json(self) -> bytes:
+        if self._summary_json is None:
+            self._summary_json = _dumps({
+                'projectId': self.project_id,
+                'revision': self.revision,
+                'responses': len(self.filenames),
+                'questions': {qid: q.summary() for qid, q in self.questions.items()},
+            })
+        return self._summary_json
+
+    def features_json(self, question_id: str) -> bytes:
+        body = self._features_json.get(question_id)
+        if body is None:
+            question = self.questions.get(question_id) or QuestionAggregate(question_id)
+            body = _dumps(dict(question.feature_collections(), questionId=question_id))
+            self._features_json[question_id] = body
+        return body
+
+
+class ResultsSummary:
+    """Cache of ``ProjectAggregate`` per project, kept in step with a ``ResponseStore``."""
+
+    def __init__(self, store):
+        self.store = store
+        self._lock = threading.Lock()
+        self._cache = {}
+
+    def _build(self, project_id: str, version=(None, None), filenames=None) -> ProjectAggregate:
+        aggregate = ProjectAggregate(project_id, *version)
+        bodies, _ = self.store.query(project_id, filenames=filenames)
+        for body in bodies:
+            response = json.loads(body)
+            aggregate.add(response['__filename'], response)
+        return aggregate
+
+    def add(self, project_id: str, filename: str, response: dict, version):
+        """Fold a just-indexed response into the cache (``version`` from ``store.add``)."""
+        generation, revision = version
+        with self._lock:
+            aggregate = self._cache.get(project_id)
+            if aggregate is None:
+                return
+            if aggregate.generation == generation and aggregate.revision == revision - 1 \
+                    and filename not in aggregate.filenames \
+                    and isinstance(response, dict) and 'answers' in response:
+                aggregate.add(filename, response)
+                aggregate.revision = revision
+            else:
+                del self._cache[project_id]
+
+    def _current(self, project_id: str) -> ProjectAggregate:
+        """Cached whole-project aggregate; the caller holds ``_lock``."""
+        version = self.store.version(project_id)
+        aggregate = self._cache.get(project_id)
+        # A project deleted and created again restarts its revisions under a
+        # new generation, so both have to match
+        if aggregate is None or (aggregate.generation, aggregate.revision) != version:
+            aggregate = self._cache[project_id] = self._build(project_id, version)
+        return aggregate
+
+    # The cached aggregate is updated in place by ``add``, so it is only read
+    # under the lock; callers get encoded bytes or copies, never the object.
+
+    def summary_json(self, project_id: str, filenames=None):
+        """``(version, body)`` of the summary, over ``filenames`` if given (uncached)."""
+        if filenames:
+            return None, self._build(project_id, filenames=filenames).summary_json()
+        with self._lock:
+            aggregate = self._current(project_id)
+            return aggregate.version, aggregate.summary_json()
+
+    def features_json(self, project_id: str, question_id: str, filenames=None):
+        """``(version, body)`` of one question's FeatureCollections."""
+        if filenames:
+            return None, self._build(project_id, filenames=filenames).features_json(question_id)
+        with self._lock:
+            aggregate = self._current(project_id)
+            return aggregate.version, aggregate.features_json(question_id)
+
+    def question_features(self, project_id: str, question_id: str):
+        """``(version, {"points"|"lines"|"polygons": [Feature]})``, copied."""
+        with self._lock:
+            aggregate = self._current(project_id)
+            question = aggregate.questions.get(question_id)
+            features = {group: list(question.features[group]) if question else [] for group in GROUPS}
+            return aggregate.version, features
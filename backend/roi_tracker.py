@@ -0,0 +1,108 @@
+"""Region-of-interest tracking around previously detected AprilTags.
+
+Between full-frame scans, movable tags are re-detected only inside small
+crops around their last position (at full resolution), and the static
+boundary tags are reused from the last full scan. A decimated full-frame
+scan runs every ``full_scan_interval`` frames, and on the next frame after
+any tracked tag is lost, so new tags still appear within a few frames.
+"""
+from collections import namedtuple
+
+import numpy as np
+
+# Detector-independent detection record; only what mapping/drawing needs
+TagDetection = namedtuple("TagDetection", ["tag_id", "center", "corners", "decision_margin"])
+
+
+def as_tag_detection(det, offset=None) -> TagDetection:
+    corners = np.asarray(det.corners, dtype=np.float64)
+    center = np.asarray(det.center, dtype=np.float64)
+    if offset is not None:
+        corners = corners + offset
+        center = center + offset
+    return TagDetection(int(det.tag_id), center, corners, float(det.decision_margin))
+
+
+class RoiTracker:
+    """Per-worker tracker; not thread-safe, give each detection worker its own."""
+
+    def __init__(self, roi_detector, full_detector, boundary_ids=(1, 2, 3, 4),
+                 full_scan_interval: int = 10, padding: float = 1.0, min_padding: int = 16):
+        self.roi_detector = roi_detector
+        self.full_detector = full_detector
+        self.boundary_ids = set(boundary_ids)
+        self.full_scan_interval = max(1, full_scan_interval)
+        self.padding = padding
+        self.min_padding = min_padding
+        self._tracks = {}
+        self._frames_since_full = self.full_scan_interval
+        self.full_scans = 0
+        self.roi_scans = 0
+
+    def detect(self, gray):
+        if self._frames_since_full >= self.full_scan_interval or not self._tracks:
+            return self._full_scan(gray)
+
+        self._frames_since_full += 1
+        self.roi_scans += 1
+        detections = {}
+        lost = False
+        for tag_id, track in self._tracks.items():
+            if tag_id in self.boundary_ids:
+                detections[tag_id] = track
+                continue
+            found = self._detect_in_roi(gray, track, tag_id)
+            if found is None:
+                lost = True
+            else:
+                detections[tag_id] = found
+
+        self._tracks = detections
+        if lost:
+            # Rescan the whole frame next time instead of waiting for the interval
+            self._frames_since_full = self.full_scan_interval
+        return list(detections.values())
+
+    def _full_scan(self, gray):
+        self._frames_since_full = 1
+        self.full_scans += 1
+        detections = {}
+        for det in self.full_detector.detect(gray, estimate_tag_pose=False):
+            tag = as_tag_detection(det)
+            if tag.tag_id not in detections or tag.decision_margin > detections[tag.tag_id].decision_margin:
+                detections[tag.tag_id] = tag
+
+        # Boundary tags are reused until the next full scan, so refine them
+        # at full resolution when the full scan ran decimated
+        for tag_id in self.boundary_ids & detections.keys():
+            refined = self._detect_in_roi(gray, detections[tag_id], tag_id)
+            if refined is not None:
+                detections[tag_id] = refined
+
+        self._tracks = detections
+        return list(detections.values())
+
+    def _detect_in_roi(self, gray, track: TagDetection, tag_id: int):
+        corners = track.corners
+        lo = corners.min(axis=0)
+        hi = corners.max(axis=0)
+        pad = max(self.min_padding, self.padding * float(np.max(hi - lo)))
+        height, width = gray.shape[:2]
+        x0 = int(max(0, lo[0] - pad))
+        y0 = int(max(0, lo[1] - pad))
+        x1 = int(min(width, hi[0] + pad))
+        y1 = int(min(height, hi[1] + pad))
+        if x1 - x0 < 8 or y1 - y0 < 8:
+            return None
+
+        roi = np.ascontiguousarray(gray[y0:y1, x0:x1])
+        best = None
+        for det in self.roi_detector.detect(roi, estimate_tag_pose=False):
+            if int(det.tag_id) == tag_id and (best is None or det.decision_margin > best.decision_margin):
+                best = det
+        if best is None:
+            return None
+        return as_tag_detection(best, offset=np.array([x0, y0], dtype=np.float64))
+
+    def stats(self) -> dict:
+        return {"full_scans": self.full_scans, "roi_scans": self.roi_scans, "tracked": len(self._tracks)}
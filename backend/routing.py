@@ -0,0 +1,488 @@
+"""Point-to-point routing backends over CSR street networks.
+
+All routers take and return node indices (see GraphData) and share the
+``route(source, target) -> (path, length)`` interface; ``None`` means the
+target is unreachable.
+
+- ``DijkstraRouter``: plain Dijkstra with early exit, the reference.
+- ``AStarRouter``: A* guided by the haversine distance to the target.
+- ``ContractionHierarchyRouter``: bidirectional upward search over a
+  contraction hierarchy; query cost depends on the hierarchy depth rather
+  than the graph size. Preprocessing is slow in Python, so the hierarchy
+  is saved to the graph store and loaded on later starts.
+"""
+import heapq
+import math
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from backend.graph_store import (
+    GraphData, fixture_graph, load_derived_arrays, load_graph_data, save_derived_arrays,
+)
+
+EARTH_RADIUS_METERS = 6371009.0
+CH_ARRAY_NAMES = (
+    "ch_rank",
+    "ch_up_offsets", "ch_up_targets", "ch_up_weights", "ch_up_mids",
+    "ch_down_offsets", "ch_down_targets", "ch_down_weights", "ch_down_mids",
+)
+INF = float("inf")
+
+
+class DijkstraRouter:
+    name = "dijkstra"
+
+    def __init__(self, data: GraphData):
+        self.data = data
+        csr = data.csr
+        self._offsets = csr.offsets.tolist()
+        self._targets = csr.targets.tolist()
+        self._lengths = csr.lengths.tolist()
+
+    @property
+    def ready(self) -> bool:
+        return True
+
+    def _heuristic(self, target: int):
+        return None
+
+    def route(self, source: int, target: int):
+        offsets = self._offsets
+        targets = self._targets
+        lengths = self._lengths
+        heuristic = self._heuristic(target)
+
+        dist = {source: 0.0}
+        prev = {source: -1}
+        settled = set()
+        heap = [(0.0, 0.0, source)]
+        while heap:
+            _, d, node = heapq.heappop(heap)
+            if node == target:
+                return _walk_back(prev, target), d
+            if node in settled:
+                continue
+            settled.add(node)
+            for slot in range(offsets[node], offsets[node + 1]):
+                nxt = targets[slot]
+                nd = d + lengths[slot]
+                if nd < dist.get(nxt, INF):
+                    dist[nxt] = nd
+                    prev[nxt] = node
+                    key = nd + heuristic(nxt) if heuristic else nd
+                    heapq.heappush(heap, (key, nd, nxt))
+        return None
+
+    def one_to_many(self, source: int, targets):
+        """Distances and predecessors from ``source``; stops once every target is settled."""
+        offsets = self._offsets
+        node_targets = self._targets
+        lengths = self._lengths
+
+        remaining = set(targets)
+        dist = {source: 0.0}
+        prev = {source: -1}
+        settled = set()
+        heap = [(0.0, source)]
+        while heap and remaining:
+            d, node = heapq.heappop(heap)
+            if node in settled:
+                continue
+            settled.add(node)
+            remaining.discard(node)
+            for slot in range(offsets[node], offsets[node + 1]):
+                nxt = node_targets[slot]
+                nd = d + lengths[slot]
+                if nd < dist.get(nxt, INF):
+                    dist[nxt] = nd
+                    prev[nxt] = node
+                    heapq.heappush(heap, (nd, nxt))
+        return {node: dist[node] for node in settled}, prev
+
+
+class AStarRouter(DijkstraRouter):
+    """Dijkstra ordered by distance + haversine lower bound to the target."""
+    name = "astar"
+
+    def __init__(self, data: GraphData):
+        super().__init__(data)
+        self._lon = np.radians(data.node_x).tolist()
+        self._lat = np.radians(data.node_y).tolist()
+        self._cos_lat = np.cos(np.radians(data.node_y)).tolist()
+
+    def _heuristic(self, target: int):
+        lon_t = self._lon[target]
+        lat_t = self._lat[target]
+        cos_t = self._cos_lat[target]
+        lons = self._lon
+        lats = self._lat
+        cos_lat = self._cos_lat
+
+        def haversine(node):
+            a = math.sin((lats[node] - lat_t) / 2.0) ** 2 + \
+                cos_lat[node] * cos_t * math.sin((lons[node] - lon_t) / 2.0) ** 2
+            return 2.0 * EARTH_RADIUS_METERS * math.asin(min(1.0, math.sqrt(a)))
+
+        return haversine
+
+
+class ContractionHierarchyRouter:
+    name = "ch"
+
+    def __init__(self, data: GraphData):
+        self.data = data
+        self._lock = threading.Lock()
+        self._ready = False
+        if all(name in data.arrays for name in CH_ARRAY_NAMES):
+            self._load(data.arrays)
+
+    @property
+    def ready(self) -> bool:
+        return self._ready
+
+    def prepare(self, witness_limit: int = 64):
+        """Build (or reuse) the hierarchy and persist it next to the graph."""
+        with self._lock:
+            if self._ready:
+                return
+            # Another server process may have stored it since this one loaded the graph
+            arrays = load_derived_arrays(self.data, CH_ARRAY_NAMES)
+            if arrays is not None:
+                self._load(arrays)
+                return
+            start = time.perf_counter()
+            arrays = contract_graph(self.data, witness_limit)
+            try:
+                save_derived_arrays(self.data, arrays)
+            except OSError as e:
+                print(f"Could not store contraction hierarchy: {e}")
+            self._load(arrays)
+            print(f"Contraction hierarchy ready for {self.data.meta.get('network_type')} "
+                  f"({time.perf_counter() - start:.1f}s)")
+
+    def prepare_async(self):
+        if self._ready:
+            return None
+        thread = threading.Thread(target=self.prepare, daemon=True)
+        thread.start()
+        return thread
+
+    def _load(self, arrays):
+        self._up = _csr_lists(arrays, "ch_up")
+        self._down = _csr_lists(arrays, "ch_down")
+        mids = {}
+        up_offsets, up_targets, _, up_mids = self._up
+        for u in range(len(up_offsets) - 1):
+            for slot in range(up_offsets[u], up_offsets[u + 1]):
+                if up_mids[slot] >= 0:
+                    mids[(u, up_targets[slot])] = up_mids[slot]
+        down_offsets, down_targets, _, down_mids = self._down
+        for v in range(len(down_offsets) - 1):
+            for slot in range(down_offsets[v], down_offsets[v + 1]):
+                if down_mids[slot] >= 0:
+                    mids[(down_targets[slot], v)] = down_mids[slot]
+        self._mids = mids
+        self._ready = True
+
+    def route(self, source: int, target: int):
+        if not self._ready:
+            raise RuntimeError("Contraction hierarchy not prepared")
+        if source == target:
+            return [source], 0.0
+
+        searches = (
+            (self._up, {source: 0.0}, {source: -1}, [(0.0, source)]),
+            (self._down, {target: 0.0}, {target: -1}, [(0.0, target)]),
+        )
+        best = INF
+        meeting = -1
+        active = [True, True]
+        turn = 0
+        while active[0] or active[1]:
+            if not active[turn]:
+                turn ^= 1
+            (offsets, targets, weights, _), dist, prev, heap = searches[turn]
+            other_dist = searches[turn ^ 1][1]
+            if not heap or heap[0][0] >= best:
+                active[turn] = False
+                turn ^= 1
+                continue
+            d, node = heapq.heappop(heap)
+            if d > dist[node]:
+                continue
+            if node in other_dist and d + other_dist[node] < best:
+                best = d + other_dist[node]
+                meeting = node
+            for slot in range(offsets[node], offsets[node + 1]):
+                nxt = targets[slot]
+                nd = d + weights[slot]
+                if nd < dist.get(nxt, INF):
+                    dist[nxt] = nd
+                    prev[nxt] = node
+                    heapq.heappush(heap, (nd, nxt))
+            turn ^= 1
+
+        if meeting < 0:
+            return None
+        forward = _walk_back(searches[0][2], meeting)
+        backward = _walk_back(searches[1][2], meeting)[::-1]
+        return self._unpack(forward + backward[1:]), best
+
+    def _unpack(self, path):
+        mids = self._mids
+        result = [path[0]]
+        stack = list(zip(path[:-1], path[1:]))[::-1]
+        while stack:
+            a, b = stack.pop()
+            mid = mids.get((a, b))
+            if mid is None:
+                result.append(b)
+            else:
+                stack.append((mid, b))
+                stack.append((a, mid))
+        return result
+
+
+def contract_graph(data: GraphData, witness_limit: int = 64) -> dict:
+    """Contract every node in edge-difference order; return CH arrays."""
+    n = data.num_nodes
+    out = [dict() for _ in range(n)]
+    inc = [dict() for _ in range(n)]
+    for u, v, w in zip(data.edge_u.tolist(), data.edge_v.tolist(), data.edge_length.tolist()):
+        if u != v and w < out[u].get(v, (INF,))[0]:
+            out[u][v] = (w, -1)
+            inc[v][u] = (w, -1)
+
+    # Contracted nodes are removed from ``out``/``inc`` so witness searches
+    # only see the remaining graph; their edges at contraction time are the
+    # upward (``up``) and downward (``down``) search graphs of the hierarchy.
+    up = [[] for _ in range(n)]
+    down = [[] for _ in range(n)]
+    deleted_neighbours = [0] * n
+
+    def witness_search(source, avoid, max_dist):
+        dist = {source: 0.0}
+        heap = [(0.0, source)]
+        settled = 0
+        while heap:
+            d, node = heapq.heappop(heap)
+            if d > dist[node]:
+                continue
+            if d > max_dist or settled >= witness_limit:
+                break
+            settled += 1
+            for nxt, (w, _) in out[node].items():
+                if nxt == avoid:
+                    continue
+                nd = d + w
+                if nd < dist.get(nxt, INF):
+                    dist[nxt] = nd
+                    heapq.heappush(heap, (nd, nxt))
+        return dist
+
+    def shortcuts(node):
+        outs = [(x, w) for x, (w, _) in out[node].items()]
+        found = []
+        if inc[node] and outs:
+            max_out = max(w for _, w in outs)
+            for u, (wu, _) in inc[node].items():
+                dist = witness_search(u, node, wu + max_out)
+                for x, wx in outs:
+                    if x != u and dist.get(x, INF) > wu + wx:
+                        found.append((u, x, wu + wx))
+        return found, len(inc[node]) + len(outs)
+
+    def priority(found, degree, node):
+        return 2 * (len(found) - degree) + deleted_neighbours[node]
+
+    heap = []
+    for node in range(n):
+        found, degree = shortcuts(node)
+        heap.append((priority(found, degree, node), node))
+    heapq.heapify(heap)
+    rank = [0] * n
+    order = 0
+    while heap:
+        _, node = heapq.heappop(heap)
+        # Lazy update: re-evaluate and defer if no longer the cheapest
+        found, degree = shortcuts(node)
+        current = priority(found, degree, node)
+        if heap and current > heap[0][0]:
+            heapq.heappush(heap, (current, node))
+            continue
+
+        for u, x, w in found:
+            if w < out[u].get(x, (INF,))[0]:
+                out[u][x] = (w, node)
+                inc[x][u] = (w, node)
+        rank[node] = order
+        order += 1
+        for x, (w, mid) in out[node].items():
+            up[node].append((x, w, mid))
+            del inc[x][node]
+            deleted_neighbours[x] += 1
+        for u, (w, mid) in inc[node].items():
+            down[node].append((u, w, mid))
+            del out[u][node]
+            deleted_neighbours[u] += 1
+        out[node] = {}
+        inc[node] = {}
+
+    arrays = {"ch_rank": np.array(rank, dtype=np.int32)}
+    for prefix, adjacency in (("ch_up", up), ("ch_down", down)):
+        counts = np.array([len(edges) for edges in adjacency], dtype=np.int64)
+        offsets = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        flat = [edge for edges in adjacency for edge in edges]
+        arrays[f"{prefix}_offsets"] = offsets
+        arrays[f"{prefix}_targets"] = np.array([e[0] for e in flat], dtype=np.int32)
+        arrays[f"{prefix}_weights"] = np.array([e[1] for e in flat], dtype=np.float64)
+        arrays[f"{prefix}_mids"] = np.array([e[2] for e in flat], dtype=np.int32)
+    return arrays
+
+
+def route_coordinates(data: GraphData, path) -> list:
+    """Concatenate the stored edge geometries along a node path.
+
+    Between consecutive nodes the shortest parallel edge is used, matching
+    the edge the routers relaxed.
+    """
+    if len(path) == 1:
+        return [[float(data.node_x[path[0]]), float(data.node_y[path[0]])]]
+    csr = data.csr
+    coords = []
+    for a, b in zip(path[:-1], path[1:]):
+        start = int(csr.offsets[a])
+        end = int(csr.offsets[a + 1])
+        slots = np.flatnonzero(csr.targets[start:end] == b) + start
+        slot = slots[np.argmin(csr.lengths[slots])]
+        segment = data.edge_coords(int(csr.edges[slot])).tolist()
+        coords.extend(segment[1:] if coords else segment)
+    return coords
+
+
+def path_to(prev, node):
+    """Node path ending at ``node`` from a one_to_many predecessor map."""
+    return _walk_back(prev, node)
+
+
+class SearchPool:
+    """Persistent process pool running one-to-many searches over one graph.
+
+    Started on first use and kept for the life of the graph; ``close`` lets
+    queued searches finish and then ends the workers. Workers are started
+    with ``spawn`` because forking a threaded server can deadlock, and each
+    reopens the graph from the store (memory-mapped) once, in its
+    initializer, instead of receiving it pickled.
+    """
+
+    def __init__(self, data: GraphData, workers: int):
+        self.data = data
+        self.workers = workers
+        self._lock = threading.Lock()
+        self._pool = None
+        self._closed = False
+
+    def _executor(self):
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("search pool is closed")
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(self.data.path, self.data.meta.get("network_type")),
+                )
+            return self._pool
+
+    def map(self, fn, items):
+        items = list(items)
+        chunksize = max(1, len(items) // (self.workers * 4))
+        return list(self._executor().map(fn, items, chunksize=chunksize))
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False)
+
+
+def distance_matrix(data: GraphData, sources, targets, pool: SearchPool = None):
+    """Shortest distances (None if unreachable) from every source to every target.
+
+    Runs one one-to-many search per source, spread over ``pool`` if given.
+    """
+    sources = [int(s) for s in sources]
+    targets = [int(t) for t in targets]
+    if pool is not None and pool.workers > 1 and len(sources) > 1:
+        return pool.map(_worker_distances, [(s, targets) for s in sources])
+
+    router = DijkstraRouter(data)
+    return [_distances_row(router, source, targets) for source in sources]
+
+
+def route_batch(data: GraphData, sources, targets, pool: SearchPool = None, router=None):
+    """``[[(length, node path) or None per target] per source]``, one search per source."""
+    sources = [int(s) for s in sources]
+    targets = [int(t) for t in targets]
+    if pool is not None and pool.workers > 1 and len(sources) > 1:
+        return pool.map(_worker_paths, [(s, targets) for s in sources])
+
+    router = router or DijkstraRouter(data)
+    return [_paths_row(router, source, targets) for source in sources]
+
+
+_worker_router = None
+
+
+def _init_worker(path, network_type):
+    global _worker_router
+    data = load_graph_data(path) if path else fixture_graph(network_type)
+    _worker_router = DijkstraRouter(data)
+
+
+def _worker_distances(args):
+    source, targets = args
+    return _distances_row(_worker_router, source, targets)
+
+
+def _worker_paths(args):
+    source, targets = args
+    return _paths_row(_worker_router, source, targets)
+
+
+def _distances_row(router, source, targets):
+    dist, _ = router.one_to_many(source, targets)
+    return [dist.get(target) for target in targets]
+
+
+def _paths_row(router, source, targets):
+    dist, prev = router.one_to_many(source, targets)
+    return [(dist[target], path_to(prev, target)) if target in dist else None for target in targets]
+
+
+def build_routers(data: GraphData) -> dict:
+    return {
+        DijkstraRouter.name: DijkstraRouter(data),
+        AStarRouter.name: AStarRouter(data),
+        ContractionHierarchyRouter.name: ContractionHierarchyRouter(data),
+    }
+
+
+def _csr_lists(arrays, prefix):
+    return tuple(arrays[f"{prefix}_{name}"].tolist() for name in ("offsets", "targets", "weights", "mids"))
+
+
+def _walk_back(prev, node):
+    path = []
+    while node != -1:
+        path.append(node)
+        node = prev[node]
+    path.reverse()
+    return path
@@ -0,0 +1,105 @@
+"""Shared-memory frame slots for running AprilTag detection in processes.
+
+pupil_apriltags mostly runs in C but the surrounding Python (and anything
+else on the publish side) still contends for the GIL, so ``--processes``
+moves detectors into separate processes. Passing full frames through a
+pipe would pickle ~1 MB per 720p grayscale frame; instead every detector
+process owns one slot of a ``SharedFrameRing``. The grayscale conversion
+writes straight into that slot, the process reads it as a NumPy view, and
+only the slot index goes down the pipe and the small detection list comes
+back.
+"""
+import multiprocessing
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from roi_tracker import as_tag_detection
+
+
+class SharedFrameRing:
+    """``slots`` uint8 frames of ``shape`` in one SharedMemory block."""
+
+    def __init__(self, shape, slots: int, name: str = None):
+        self.shape = tuple(shape)
+        self.slots = slots
+        size = slots * int(np.prod(self.shape))
+        self._owner = name is None
+        if self._owner:
+            self._shm = shared_memory.SharedMemory(create=True, size=size)
+        else:
+            # Children started by multiprocessing share the parent's resource
+            # tracker, so only the owner's unlink releases the block
+            self._shm = shared_memory.SharedMemory(name=name)
+        self.frames = np.ndarray((slots,) + self.shape, dtype=np.uint8, buffer=self._shm.buf)
+
+    @classmethod
+    def attach(cls, spec):
+        name, shape, slots = spec
+        return cls(shape, slots, name=name)
+
+    def spec(self):
+        """Picklable ``(name, shape, slots)`` for ``attach`` in another process."""
+        return self._shm.name, self.shape, self.slots
+
+    def view(self, slot: int) -> np.ndarray:
+        return self.frames[slot]
+
+    def close(self):
+        self.frames = None
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+
+
+def _serve(spec, slot: int, conn, make_detect_fn):
+    ring = SharedFrameRing.attach(spec)
+    detect_fn = make_detect_fn()
+    image = ring.view(slot)
+    try:
+        while True:
+            message = conn.recv()
+            if message is None:
+                break
+            conn.send([as_tag_detection(det) for det in detect_fn(image)])
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        image = None
+        ring.close()
+
+
+class ProcessDetector:
+    """``detect(gray)`` callable backed by a detector in its own process.
+
+    ``make_detect_fn`` must be picklable (e.g. a ``functools.partial`` of a
+    module-level function); it builds the detector inside the child. Write
+    the frame into ``buffer`` to avoid the copy into shared memory.
+    """
+
+    def __init__(self, ring: SharedFrameRing, slot: int, make_detect_fn, context=None):
+        context = context or multiprocessing.get_context("spawn")
+        self.buffer = ring.view(slot)
+        self._conn, child_conn = context.Pipe()
+        self._process = context.Process(
+            target=_serve, args=(ring.spec(), slot, child_conn, make_detect_fn),
+            name=f"detector-{slot}", daemon=True
+        )
+        self._process.start()
+        child_conn.close()
+
+    def __call__(self, gray):
+        if not np.shares_memory(gray, self.buffer):
+            if gray.shape != self.buffer.shape:
+                raise ValueError(f"Frame size {gray.shape} does not match shared slot {self.buffer.shape}")
+            self.buffer[...] = gray
+        self._conn.send(True)
+        return self._conn.recv()
+
+    def close(self):
+        try:
+            self._conn.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+        self._process.join(timeout=2.0)
+        self._conn.close()
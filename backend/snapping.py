@@ -0,0 +1,36 @@
+"""KD-tree index for snapping lon/lat points to the nearest graph node."""
+import numpy as np
+from scipy.spatial import cKDTree
+
+from backend.graph_store import GraphData
+
+METERS_PER_DEGREE = 111320.0
+
+
+class NodeIndex:
+    """cKDTree over node coordinates projected to local metres.
+
+    An equirectangular projection around the graph centre is accurate to
+    well under a metre at city scale, which is all snapping needs.
+    """
+
+    def __init__(self, data: GraphData):
+        self.data = data
+        self.lon0 = float(np.mean(data.node_x))
+        self.lat0 = float(np.mean(data.node_y))
+        self.scale = np.array([METERS_PER_DEGREE * np.cos(np.radians(self.lat0)), METERS_PER_DEGREE])
+        self.tree = cKDTree(self.project(data.node_x, data.node_y))
+
+    def project(self, lons, lats) -> np.ndarray:
+        points = np.column_stack([np.asarray(lons, dtype=np.float64), np.asarray(lats, dtype=np.float64)])
+        return (points - (self.lon0, self.lat0)) * self.scale
+
+    def nearest(self, lon: float, lat: float):
+        """Return (node index, distance in metres) for one point."""
+        distance, index = self.tree.query(((lon - self.lon0) * self.scale[0], (lat - self.lat0) * self.scale[1]))
+        return int(index), float(distance)
+
+    def nearest_many(self, lons, lats):
+        """Vectorized snapping: arrays of node indices and distances in metres."""
+        distances, indices = self.tree.query(self.project(lons, lats))
+        return indices.astype(np.int64), distances
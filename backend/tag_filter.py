@@ -0,0 +1,121 @@
+"""Temporal smoothing and debouncing of mapped tag positions.
+
+Raw per-frame positions jitter by a few thousandths of the map and tags near
+the margin threshold flicker in and out, which makes the browser re-request
+routes and isochrones for nothing. ``TagFilter`` sits between
+``map_detections`` and the publisher:
+
+- presence hysteresis: a tag must be seen ``appear_frames`` frames in a row
+  to show up and missed ``disappear_frames`` in a row to go away (its last
+  position is held meanwhile);
+- One-Euro filter per coordinate: heavy smoothing when a tag is still, little
+  lag when it moves fast;
+- movement epsilon: the published position only changes once the filtered
+  one has moved more than ``epsilon`` from it.
+"""
+import math
+
+
+class OneEuroFilter:
+    """One-Euro low-pass filter (Casiez et al. 2012) for a single value."""
+
+    def __init__(self, min_cutoff: float = 1.0, beta: float = 5.0, d_cutoff: float = 1.0):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self._value = None
+        self._deriv = 0.0
+        self._timestamp = None
+
+    @staticmethod
+    def _alpha(cutoff: float, dt: float) -> float:
+        tau = 1.0 / (2.0 * math.pi * cutoff)
+        return 1.0 / (1.0 + tau / dt)
+
+    def __call__(self, value: float, timestamp: float) -> float:
+        if self._value is None:
+            self._value = value
+            self._timestamp = timestamp
+            return value
+        dt = timestamp - self._timestamp
+        if dt <= 0:
+            dt = 1.0 / 30.0
+        self._timestamp = timestamp
+
+        deriv = (value - self._value) / dt
+        a_d = self._alpha(self.d_cutoff, dt)
+        self._deriv = a_d * deriv + (1.0 - a_d) * self._deriv
+        cutoff = self.min_cutoff + self.beta * abs(self._deriv)
+        a = self._alpha(cutoff, dt)
+        self._value = a * value + (1.0 - a) * self._value
+        return self._value
+
+
+class Hysteresis:
+    """Debounced set membership: N hits to enter, M misses to leave."""
+
+    def __init__(self, appear_frames: int = 2, disappear_frames: int = 5):
+        self.appear_frames = max(1, appear_frames)
+        self.disappear_frames = max(1, disappear_frames)
+        self._hits = {}
+        self._misses = {}
+        self.present = set()
+
+    def update(self, seen) -> set:
+        seen = set(seen)
+        for key in seen:
+            self._misses.pop(key, None)
+            self._hits[key] = self._hits.get(key, 0) + 1
+            if self._hits[key] >= self.appear_frames:
+                self.present.add(key)
+        for key in self._hits.keys() - seen:
+            # An unbroken run is needed to appear
+            del self._hits[key]
+        for key in self.present - seen:
+            self._misses[key] = self._misses.get(key, 0) + 1
+            if self._misses[key] >= self.disappear_frames:
+                del self._misses[key]
+                self.present.discard(key)
+        return self.present
+
+
+class TagFilter:
+    """Filters ``map_detections`` output before it reaches the publisher."""
+
+    def __init__(self, appear_frames: int = 2, disappear_frames: int = 5, epsilon: float = 0.002,
+                 min_cutoff: float = 1.0, beta: float = 5.0):
+        self.epsilon = epsilon
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self._ids = Hysteresis(appear_frames, disappear_frames)
+        self._tags = Hysteresis(appear_frames, disappear_frames)
+        self._filters = {}
+        self._output = {}
+
+    def update(self, tags: dict, detected_ids: list, timestamp: float):
+        """Return debounced ``(tags, detected_ids)`` for one frame."""
+        stable_ids = self._ids.update(detected_ids)
+        present = self._tags.update(tags.keys())
+
+        for key in list(self._output):
+            if key not in present:
+                del self._output[key]
+                self._filters.pop(key, None)
+
+        for key in present & tags.keys():
+            tag = tags[key]
+            fx, fy = self._filters.setdefault(key, (
+                OneEuroFilter(self.min_cutoff, self.beta),
+                OneEuroFilter(self.min_cutoff, self.beta),
+            ))
+            x = fx(tag["x"], timestamp)
+            y = fy(tag["y"], timestamp)
+            previous = self._output.get(key)
+            if previous is None or abs(x - previous["x"]) > self.epsilon or abs(y - previous["y"]) > self.epsilon:
+                self._output[key] = dict(tag, x=x, y=y)
+            else:
+                previous["margin"] = tag["margin"]
+
+        # Copies, so published snapshots are never mutated afterwards
+        filtered = {key: dict(tag) for key, tag in self._output.items()}
+        return filtered, sorted(stable_ids)
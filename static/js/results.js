@@ -38,7 +38,8 @@ function getQueryParams(name) {
 async function fetchResponses(projectId) {
     if (!projectId) return [];
     try {
-        const response = await fetch(`/api/responses?project=${encodeURIComponent(projectId)}`);
+        // Listing only (filename, savedAt); answers are aggregated server-side
+        const response = await fetch(`/api/responses?project=${encodeURIComponent(projectId)}&summary=1`);
         if (!response.ok) return [];
         const data = await response.json();
         return Array.isArray(data.responses) ? data.responses : [];
@@ -60,27 +61,36 @@ function normalizeResponseSelection() {
 function pickResponses(responses, filenames) {
     if (!responses.length) return [];
     if (filenames.length) {
-        const filtered = responses.filter(item => filenames.includes(item.__filename));
+        const filtered = responses.filter(item => filenames.includes(item.filename));
         return filtered.length ? filtered : responses.slice(0, 1);
     }
     return responses.slice(0, 1);
 }
 
-function buildAnswersByQuestion(responses) {
-    const map = new Map();
-    (responses || []).forEach(response => {
-        const list = Array.isArray(response.answers) ? response.answers : [];
-        list.forEach(answer => {
-            if (!answer || !answer.questionId) return;
-            if (!map.has(answer.questionId)) {
-                map.set(answer.questionId, []);
-            }
-            map.get(answer.questionId).push({ response, answer });
-        });
-    });
-    return map;
+function resultsSummaryUrl(projectId, selected, allResponses, questionId) {
+    const params = new URLSearchParams();
+    // The whole project is served from the server's cached aggregate
+    if (selected.length !== allResponses.length) {
+        selected.forEach(item => params.append('response', item.filename));
+    }
+    if (questionId) params.set('question', questionId);
+    const query = params.toString();
+    return `/api/results/${encodeURIComponent(projectId)}/summary${query ? `?${query}` : ''}`;
 }
 
+async function fetchJson(url) {
+    try {
+        const response = await fetch(url);
+        if (!response.ok) return null;
+        return await response.json();
+    } catch (error) {
+        return null;
+    }
+}
+
+// Above this many drawn features the whole-project view shows density cells
+const DENSITY_FEATURE_THRESHOLD = 300;
+
 const responseLayerIds = {
     pointsSource: 'selected-response-points',
     pointsLayer: 'selected-response-points-layer',
@@ -89,7 +99,10 @@ const responseLayerIds = {
     linesLayer: 'selected-response-lines-layer',
     polygonsSource: 'selected-response-polygons',
     polygonsFill: 'selected-response-polygons-fill',
-    polygonsOutline: 'selected-response-polygons-outline'
+    polygonsOutline: 'selected-response-polygons-outline',
+    densitySource: 'selected-response-density',
+    densityFill: 'selected-response-density-fill',
+    densityOutline: 'selected-response-density-outline'
 };
 
 function removeLayerIfExists(map, id) {
@@ -104,7 +117,13 @@ function removeSourceIfExists(map, id) {
     }
 }
 
-function clearResponseLayers(map) {
+function clearDensityLayers(map) {
+    removeLayerIfExists(map, responseLayerIds.densityOutline);
+    removeLayerIfExists(map, responseLayerIds.densityFill);
+    removeSourceIfExists(map, responseLayerIds.densitySource);
+}
+
+function clearFeatureLayers(map) {
     removeLayerIfExists(map, responseLayerIds.pointsLayer);
     removeLayerIfExists(map, responseLayerIds.linesGlow);
     removeLayerIfExists(map, responseLayerIds.linesLayer);
@@ -115,7 +134,41 @@ function clearResponseLayers(map) {
     removeSourceIfExists(map, responseLayerIds.polygonsSource);
 }
 
+function clearResponseLayers(map) {
+    clearFeatureLayers(map);
+    clearDensityLayers(map);
+}
+
+function ensureDensityLayers(map, cellData, drawColor = '#FF00FF') {
+    if (map.getSource(responseLayerIds.densitySource)) {
+        map.getSource(responseLayerIds.densitySource).setData(cellData);
+        map.setPaintProperty(responseLayerIds.densityFill, 'fill-color', drawColor);
+        return;
+    }
+    map.addSource(responseLayerIds.densitySource, { type: 'geojson', data: cellData });
+    map.addLayer({
+        id: responseLayerIds.densityFill,
+        type: 'fill',
+        source: responseLayerIds.densitySource,
+        paint: {
+            'fill-color': drawColor,
+            'fill-opacity': ['interpolate', ['linear'], ['get', 'intensity'], 0, 0.1, 1, 0.75]
+        }
+    });
+    map.addLayer({
+        id: responseLayerIds.densityOutline,
+        type: 'line',
+        source: responseLayerIds.densitySource,
+        paint: {
+            'line-color': '#ffffff',
+            'line-width': 0.5,
+            'line-opacity': 0.25
+        }
+    });
+}
+
 function ensureResponseLayers(map, pointData, lineData, polygonData, drawColor = '#FF00FF') {
+    clearDensityLayers(map);
     if (!map.getSource(responseLayerIds.pointsSource)) {
         map.addSource(responseLayerIds.pointsSource, { type: 'geojson', data: pointData });
         map.addLayer({
@@ -194,33 +247,18 @@ function ensureResponseLayers(map, pointData, lineData, polygonData, drawColor =
     }
 }
 
-function splitFeaturesByGeometry(features) {
-    const pointFeatures = [];
-    const lineFeatures = [];
-    const polygonFeatures = [];
-
-    (features || []).forEach(feature => {
-        const geomType = feature?.geometry?.type;
-        if (!geomType) return;
-        if (geomType === 'Point' || geomType === 'MultiPoint') {
-            pointFeatures.push(feature);
-        } else if (geomType === 'LineString' || geomType === 'MultiLineString') {
-            lineFeatures.push(feature);
-        } else if (geomType === 'Polygon' || geomType === 'MultiPolygon') {
-            polygonFeatures.push(feature);
-        }
-    });
-
-    return { pointFeatures, lineFeatures, polygonFeatures };
-}
-
 async function initResults() {
     const setupConfig = await loadSetupConfig();
     const responseFilenames = normalizeResponseSelection();
     const projectId = setupConfig.project?.id;
     const responseList = await fetchResponses(projectId);
     const selectedResponses = pickResponses(responseList, responseFilenames);
-    const answersByQuestion = buildAnswersByQuestion(selectedResponses);
+    const summary = selectedResponses.length
+        ? await fetchJson(resultsSummaryUrl(projectId, selectedResponses, responseList))
+        : null;
+    const questionSummaries = summary?.questions || {};
+    const featureRequests = new Map();
+    const densityRequests = new Map();
 
     if (setupConfig.project.rearProjection) {
         document.body.style.transform = 'scaleX(-1)';
@@ -268,6 +306,14 @@ async function initResults() {
         }
     });
 
+    // Density cells are binned per zoom level
+    map.on('zoomend', () => {
+        const q = questions[currentQuestionIndex];
+        if (q && usesDensity(q) && map.isStyleLoaded()) {
+            renderResponseOnMap(q);
+        }
+    });
+
     function renderDots() {
         if (!dotsContainer) return;
         dotsContainer.innerHTML = '';
@@ -316,8 +362,36 @@ async function initResults() {
         questionOptions.classList.remove('hidden');
     }
 
-    function getAnswerEntries(questionId) {
-        return answersByQuestion.get(questionId) || [];
+    function getQuestionSummary(questionId) {
+        return questionSummaries[questionId] || null;
+    }
+
+    function fetchQuestionFeatures(questionId) {
+        if (!featureRequests.has(questionId)) {
+            featureRequests.set(
+                questionId,
+                fetchJson(resultsSummaryUrl(projectId, selectedResponses, responseList, questionId))
+            );
+        }
+        return featureRequests.get(questionId);
+    }
+
+    function fetchDensity(questionId, zoom) {
+        const key = `${questionId}:${zoom}`;
+        if (!densityRequests.has(key)) {
+            const params = new URLSearchParams({ question: questionId, zoom: String(zoom) });
+            densityRequests.set(
+                key,
+                fetchJson(`/api/results/${encodeURIComponent(projectId)}/density?${params.toString()}`)
+            );
+        }
+        return densityRequests.get(key);
+    }
+
+    function usesDensity(question) {
+        const counts = getQuestionSummary(question.id)?.features;
+        if (!counts || selectedResponses.length !== responseList.length) return false;
+        return counts.points + counts.lines + counts.polygons >= DENSITY_FEATURE_THRESHOLD;
     }
 
     function renderSummaryPanel(question) {
@@ -326,8 +400,8 @@ async function initResults() {
         resultsSummaryTitle.textContent = question?.text ? question.text : 'Question Summary';
         resultsSummaryBody.innerHTML = '';
 
-        const entries = getAnswerEntries(question.id);
-        if (!entries.length) {
+        const stats = getQuestionSummary(question.id);
+        if (!stats || !stats.count) {
             const empty = document.createElement('div');
             empty.className = 'rounded border border-white/10 bg-white/5 px-3 py-2 text-xs text-white/70';
             empty.textContent = 'No responses selected for this question.';
@@ -336,22 +410,7 @@ async function initResults() {
         }
 
         if (['single-choice', 'multi-choice'].includes(question.type)) {
-            const counts = new Map();
-            entries.forEach(entry => {
-                const value = entry.answer?.answer;
-                if (question.type === 'multi-choice') {
-                    if (Array.isArray(value)) {
-                        value.forEach(option => {
-                            if (!option) return;
-                            counts.set(option, (counts.get(option) || 0) + 1);
-                        });
-                    }
-                } else if (value != null) {
-                    counts.set(value, (counts.get(value) || 0) + 1);
-                }
-            });
-
-            const rows = Array.from(counts.entries()).sort((a, b) => b[1] - a[1]);
+            const rows = Array.isArray(stats.options) ? stats.options : [];
             if (!rows.length) {
                 const empty = document.createElement('div');
                 empty.className = 'rounded border border-white/10 bg-white/5 px-3 py-2 text-xs text-white/70';
@@ -391,10 +450,7 @@ async function initResults() {
         if (question.type === 'text') {
             const list = document.createElement('div');
             list.className = 'max-h-40 overflow-auto flex flex-col gap-2';
-            const texts = entries
-                .map(entry => entry.answer?.answer)
-                .filter(value => value != null && String(value).trim().length > 0)
-                .map(value => String(value));
+            const texts = Array.isArray(stats.texts) ? stats.texts : [];
 
             if (!texts.length) {
                 const empty = document.createElement('div');
@@ -420,34 +476,39 @@ async function initResults() {
         resultsSummaryBody.appendChild(info);
     }
 
-    function renderResponseOnMap(question) {
+    async function renderResponseOnMap(question) {
         if (!map.isStyleLoaded()) return;
-        const entries = getAnswerEntries(question.id);
-        const collected = [];
-
-        entries.forEach(entry => {
-            const features = entry.answer?.answer?.features;
-            if (Array.isArray(features)) {
-                collected.push(...features);
-            }
-        });
-
-        if (!collected.length) {
+        const counts = getQuestionSummary(question.id)?.features;
+        if (!counts || !(counts.points || counts.lines || counts.polygons)) {
             clearResponseLayers(map);
             return;
         }
 
-        const { pointFeatures, lineFeatures, polygonFeatures } = splitFeaturesByGeometry(collected);
         const drawColor = question.type === 'drawing' && question.drawColor 
             ? question.drawColor 
             : '#FF00FF'; // Default magenta
-        ensureResponseLayers(
-            map,
-            { type: 'FeatureCollection', features: pointFeatures },
-            { type: 'FeatureCollection', features: lineFeatures },
-            { type: 'FeatureCollection', features: polygonFeatures },
-            drawColor
-        );
+
+        if (usesDensity(question)) {
+            const cells = await fetchDensity(question.id, Math.floor(map.getZoom()));
+            if (questions[currentQuestionIndex]?.id !== question.id) return;
+            if (!cells) {
+                clearResponseLayers(map);
+                return;
+            }
+            clearFeatureLayers(map);
+            ensureDensityLayers(map, cells, drawColor);
+            return;
+        }
+
+        const collections = await fetchQuestionFeatures(question.id);
+        // The user may have moved on while the geometry was loading
+        if (questions[currentQuestionIndex]?.id !== question.id) return;
+        if (!collections) {
+            clearResponseLayers(map);
+            return;
+        }
+
+        ensureResponseLayers(map, collections.points, collections.lines, collections.polygons, drawColor);
     }
 
     function updateQuestion() {
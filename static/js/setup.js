@@ -110,6 +110,8 @@ let selectedQuestionId = null;
 let isSwitching = false; 
 let sortableInstance = null;
 let responsesRefreshTimer = null;
+// The list is loaded as summaries (filename, savedAt) in pages of this size
+const RESPONSES_PAGE_SIZE = 500;
 
 const els = {
     projectName: document.getElementById('project-name'),
@@ -411,9 +413,29 @@ function getResponseFilename(response) {
     return response && response.__filename ? response.__filename : formatResponseFilename(response);
 }
 
-function downloadResponse(response) {
-    if (!response) return;
-    const filename = getResponseFilename(response);
+// The list only holds summaries; fetch the full response when it is needed
+async function fetchFullResponse(filename) {
+    const projectId = state.project?.id;
+    if (!projectId || !filename) return null;
+    try {
+        const params = new URLSearchParams({ project: projectId, filename });
+        const res = await fetch(`/api/responses?${params.toString()}`);
+        if (!res.ok) return null;
+        const data = await res.json();
+        return Array.isArray(data.responses) && data.responses.length ? data.responses[0] : null;
+    } catch (err) {
+        return null;
+    }
+}
+
+async function downloadResponse(summary) {
+    if (!summary) return;
+    const filename = getResponseFilename(summary);
+    const response = await fetchFullResponse(filename);
+    if (!response) {
+        alert('Failed to load response.');
+        return;
+    }
     const copy = { ...response };
     delete copy.__filename;
     const blob = new Blob([JSON.stringify(copy, null, 2)], { type: 'application/json' });
@@ -425,8 +447,13 @@ function downloadResponse(response) {
     URL.revokeObjectURL(url);
 }
 
-function viewResponse(response) {
-    if (!response) return;
+async function viewResponse(summary) {
+    if (!summary) return;
+    const response = await fetchFullResponse(getResponseFilename(summary));
+    if (!response) {
+        alert('Failed to load response.');
+        return;
+    }
     const copy = { ...response };
     delete copy.__filename;
     const blob = new Blob([JSON.stringify(copy, null, 2)], { type: 'application/json' });
@@ -601,13 +628,24 @@ async function loadResponses(projectId) {
         return;
     }
     try {
-        const res = await fetch(`/api/responses?project=${encodeURIComponent(projectId)}`);
-        if (res.ok) {
+        const loaded = [];
+        let total = Infinity;
+        while (loaded.length < total) {
+            const params = new URLSearchParams({
+                project: projectId,
+                summary: '1',
+                limit: String(RESPONSES_PAGE_SIZE),
+                offset: String(loaded.length)
+            });
+            const res = await fetch(`/api/responses?${params.toString()}`);
+            if (!res.ok) throw new Error(`HTTP ${res.status}`);
             const data = await res.json();
-            responses = Array.isArray(data.responses) ? data.responses : [];
-        } else {
-            responses = [];
+            const page = Array.isArray(data.responses) ? data.responses : [];
+            page.forEach(item => loaded.push({ __filename: item.filename, savedAt: item.savedAt }));
+            total = Number.isFinite(data.total) ? data.total : loaded.length;
+            if (!page.length) break;
         }
+        responses = loaded;
     } catch (err) {
         responses = [];
     }
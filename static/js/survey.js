@@ -51,6 +51,7 @@ export function initSurvey({ map, setupConfig, fallbackConfig, loadAndRenderLaye
     let tuiRows = [];
     let previousResponses = [];
     let previousResponsesLoaded = false;
+    const PREVIOUS_RESPONSES_PAGE_SIZE = 200;
     let showPreviousAnswers = false;
 
     function renderDots() {
@@ -271,18 +272,42 @@ export function initSurvey({ map, setupConfig, fallbackConfig, loadAndRenderLaye
         return parsed.toLocaleString();
     }
 
+    // Answers need the full responses, but only those saved after the newest
+    // one already held are fetched again (in pages), not the whole project
     async function fetchPreviousResponses() {
         const projectId = setupConfig.project.id;
         if (!projectId) return [];
+        const known = previousResponsesLoaded ? previousResponses : [];
+        const newest = known.reduce((latest, item) => (item.savedAt > latest ? item.savedAt : latest), '');
+        const knownFiles = new Set(known.map(item => item.__filename));
+        const fetched = [];
         try {
-            const response = await fetch(`/api/responses?project=${encodeURIComponent(projectId)}`);
-            if (!response.ok) return [];
-            const data = await response.json();
-            return Array.isArray(data.responses) ? data.responses : [];
+            let offset = 0;
+            let total = Infinity;
+            while (offset < total) {
+                const params = new URLSearchParams({
+                    project: projectId,
+                    limit: String(PREVIOUS_RESPONSES_PAGE_SIZE),
+                    offset: String(offset)
+                });
+                if (newest) params.set('since', newest);
+                const response = await fetch(`/api/responses?${params.toString()}`);
+                if (!response.ok) break;
+                const data = await response.json();
+                const page = Array.isArray(data.responses) ? data.responses : [];
+                page.forEach(item => {
+                    if (knownFiles.has(item.__filename)) return;
+                    knownFiles.add(item.__filename);
+                    fetched.push(item);
+                });
+                offset += page.length;
+                total = Number.isFinite(data.total) ? data.total : offset;
+                if (!page.length) break;
+            }
         } catch (error) {
             console.error('Error loading previous responses:', error);
-            return [];
         }
+        return [...fetched, ...known];
     }
 
     function getPreviousAnswersForQuestion(questionId) {
@@ -16,6 +16,8 @@ const COOLDOWN_DURATION = 2000; // Show map for 2s before trying again
 const HIT_THRESHOLD = 2;
 const MISS_THRESHOLD = 5;
 const TAG_DRAW_MIN_DISTANCE_PX = 10;
+const POSITION_SERVER = 'http://localhost:5000';
+const POSITION_TICK_MS = 30;
 
 function createDebugDot() {
     const debugDot = document.createElement('div');
@@ -134,6 +136,11 @@ export function initTagTracking({ map, setupConfig, draw }) {
     let tagDrawingCoordinates = [];
     let lastTagDrawScreenPoint = null;
     let isCheckingPosition = false;
+    // Latest message from the detector's event stream; null while polling
+    let positionStream = null;
+    let streamedPosition = null;
+    let polledPosition = null;
+    let lastProcessedTime = 0;
 
     function updateTagStates(detectedTags) {
         const detectedIds = new Set();
@@ -217,14 +224,32 @@ export function initTagTracking({ map, setupConfig, draw }) {
         isCheckingPosition = true;
         try {
             const now = Date.now();
-            const response = await fetch('http://localhost:5000/api/position');
+            lastProcessedTime = now;
+            let data;
+            if (positionStream && positionStream.readyState === EventSource.OPEN) {
+                if (!streamedPosition) return;
+                data = streamedPosition;
+            } else {
+                // 304 means the last polled snapshot is still current; any other
+                // answer replaces it, also when the detector restarted (new boot
+                // id, seq counting from 0 again)
+                const since = polledPosition
+                    ? `?since=${polledPosition.seq}&boot=${encodeURIComponent(polledPosition.boot ?? '')}`
+                    : '';
+                const response = await fetch(`${POSITION_SERVER}/api/position${since}`, { cache: 'no-store' });
+
+                if (response.status === 304 && polledPosition) {
+                    data = polledPosition;
+                } else {
+                    if (!response.ok) {
+                        return;
+                    }
 
-            if (!response.ok) {
-                return;
+                    data = await response.json();
+                    polledPosition = data;
+                }
             }
 
-            const data = await response.json();
-
             // data.tags is a dictionary keyed by tag id with normalized positions.
             const detectedTags = data.tags || {};
             const { detectedIds, visibleIds } = updateTagStates(detectedTags);
@@ -703,6 +728,32 @@ export function initTagTracking({ map, setupConfig, draw }) {
         }
     }
 
-    const intervalId = setInterval(checkPosition, 30);
-    return { stop: () => clearInterval(intervalId) };
+    // The detector pushes a message only when tags change; handle each one
+    // immediately and keep ticking so hit/miss counters and the search-mode
+    // timers advance while the table is static. Falls back to polling when
+    // the stream is unavailable.
+    if (typeof EventSource !== 'undefined') {
+        positionStream = new EventSource(`${POSITION_SERVER}/api/position/stream`);
+        positionStream.onmessage = (event) => {
+            try {
+                streamedPosition = JSON.parse(event.data);
+            } catch (error) {
+                console.error('Position stream parse error:', error);
+                return;
+            }
+            checkPosition();
+        };
+    }
+
+    const intervalId = setInterval(() => {
+        if (Date.now() - lastProcessedTime >= POSITION_TICK_MS / 2) {
+            checkPosition();
+        }
+    }, POSITION_TICK_MS);
+    return {
+        stop: () => {
+            clearInterval(intervalId);
+            if (positionStream) positionStream.close();
+        }
+    };
 }